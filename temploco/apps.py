@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TemplocoConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "temploco"
+
+    def ready(self) -> None:
+        # Register the models, and the signals that keep search in sync.
+        from . import contacts, search  # pyright: ignore[reportUnusedImport]
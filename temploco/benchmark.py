@@ -0,0 +1,389 @@
+"""Benchmarks for composing routes and layouts.
+
+Requests are made in-process with Django's test client, against route
+trees generated for a given depth, fan-out and layout size, and against
+the contacts routes with tables of different sizes. Each benchmark
+reports its throughput, latency, memory and query count, and results can
+be saved as a baseline for later runs to be compared against.
+
+Benchmarks are run in a test database, so they never touch real data.
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import threading
+import tracemalloc
+import warnings
+from dataclasses import asdict, dataclass
+from statistics import mean, quantiles
+from time import perf_counter
+from types import ModuleType
+from typing import Any, Callable, Generator, Iterator, Optional, cast
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest
+from django.http.response import HttpResponse, HttpResponseBase, StreamingHttpResponse
+from django.test import Client
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from .layout import LayoutResponse, PartialResponse, Route
+
+
+@dataclass(frozen=True)
+class Result:
+    name: str
+    requests: int
+    requests_per_second: float
+    p50_ms: float
+    p99_ms: float
+    allocated_kib: float
+    queries: float
+
+
+class QueryCounter:
+    """Counts the queries run on every connection, from any thread.
+
+    Concurrent routes query from worker threads with connections of
+    their own, so the counter is installed on each new connection.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.__lock = threading.Lock()
+
+    def __call__(
+        self,
+        execute: Callable[..., Any],
+        sql: str,
+        params: Any,
+        many: bool,
+        context: Any,
+    ) -> Any:
+        with self.__lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self, sender: Any, connection: Any, **kwargs: Any) -> None:
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    @contextmanager
+    def installed(self) -> Generator[None, None, None]:
+        connection_created.connect(self.install)
+        for conn in connections.all(initialized_only=True):
+            self.install(None, conn)
+        try:
+            yield
+        finally:
+            connection_created.disconnect(self.install)
+            for conn in connections.all(initialized_only=True):
+                if self in conn.execute_wrappers:
+                    conn.execute_wrappers.remove(self)
+
+
+def consume(response: HttpResponseBase) -> bytes:
+    if isinstance(response, StreamingHttpResponse):
+        # Async streams are consumed synchronously here, which Django
+        # warns about, but that's exactly what's being measured.
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return b"".join(response)
+    return cast(HttpResponse, response).content
+
+
+def measure(
+    name: str,
+    request: Callable[[], HttpResponseBase],
+    *,
+    requests: int,
+    warmup: int,
+    counter: QueryCounter,
+) -> Result:
+    """Time a request, then make it again to count memory and queries.
+
+    Memory and queries are counted in a separate pass, since tracing
+    memory slows everything down.
+    """
+    for _ in range(warmup):
+        consume(request())
+    latencies: list[float] = []
+    gc.collect()
+    started = perf_counter()
+    for _ in range(requests):
+        begin = perf_counter()
+        consume(request())
+        latencies.append(perf_counter() - begin)
+    elapsed = perf_counter() - started
+
+    passes = min(requests, 20)
+    peaks: list[int] = []
+    counter.count = 0
+    tracemalloc.start()
+    try:
+        for _ in range(passes):
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            consume(request())
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    queries = counter.count / passes
+
+    cuts = quantiles(latencies, n=100, method="inclusive")
+    return Result(
+        name=name,
+        requests=requests,
+        requests_per_second=requests / elapsed,
+        p50_ms=cuts[49] * 1000,
+        p99_ms=cuts[98] * 1000,
+        allocated_kib=mean(peaks) / 1024,
+        queries=queries,
+    )
+
+
+def synthetic_layout(level: int, size: int) -> Callable[..., LayoutResponse]:
+    def layout(request: HttpRequest, **kwargs: Any) -> LayoutResponse:
+        return LayoutResponse.render(
+            request,
+            "temploco/benchmark/level.html",
+            {"outlet": f"level{level}", "padding": "x" * size},
+        )
+
+    return layout
+
+
+def synthetic_view(request: HttpRequest, **kwargs: Any) -> PartialResponse:
+    return PartialResponse.render(
+        request, "temploco/benchmark/leaf.html", {"padding": "leaf"}
+    )
+
+
+def synthetic_route(
+    depth: int, fanout: int, layout_size: int, *, level: int = 0, path: str = ""
+) -> Route:
+    """A route with a layout at every level, and views at the leaves.
+
+    Each level has fanout children, so there are fanout ** depth leaves,
+    all below depth layouts.
+    """
+    if level == depth - 1:
+        children = [
+            Route(path=f"leaf{i}/", view=synthetic_view, name=f"leaf{i}")
+            for i in range(fanout)
+        ]
+    else:
+        children = [
+            synthetic_route(
+                depth,
+                fanout,
+                layout_size,
+                level=level + 1,
+                path=f"level{level + 1}-{i}/",
+            )
+            for i in range(fanout)
+        ]
+    return Route(
+        path=path,
+        layout=synthetic_layout(level, layout_size),
+        outlet=f"level{level}",
+        children=children,
+    )
+
+
+def synthetic_urlconf(depth: int, fanout: int, layout_size: int) -> ModuleType:
+    urlconf = ModuleType("temploco_benchmark_urls")
+    urlconf.urlpatterns = [  # type: ignore
+        synthetic_route(depth, fanout, layout_size).path()
+    ]
+    return urlconf
+
+
+def last_leaf(depth: int, fanout: int) -> str:
+    levels = "".join(f"level{level}-{fanout - 1}/" for level in range(1, depth))
+    return f"/{levels}leaf{fanout - 1}/"
+
+
+def route_benchmarks(
+    depth: int,
+    fanout: int,
+    layout_size: int,
+    *,
+    requests: int,
+    warmup: int,
+    counter: QueryCounter,
+) -> Iterator[Result]:
+    name = f"routes[depth={depth},fanout={fanout},layout={layout_size}]"
+
+    compile_times: list[float] = []
+    for _ in range(max(1, requests // 10)):
+        begin = perf_counter()
+        synthetic_urlconf(depth, fanout, layout_size)
+        compile_times.append(perf_counter() - begin)
+    yield Result(
+        name=f"{name} compile",
+        requests=len(compile_times),
+        requests_per_second=len(compile_times) / sum(compile_times),
+        p50_ms=sorted(compile_times)[len(compile_times) // 2] * 1000,
+        p99_ms=max(compile_times) * 1000,
+        allocated_kib=0.0,
+        queries=0.0,
+    )
+
+    client = Client()
+    url = last_leaf(depth, fanout)
+    with override_settings(ROOT_URLCONF=synthetic_urlconf(depth, fanout, layout_size)):
+        yield measure(
+            f"{name} full",
+            lambda: client.get(url),
+            requests=requests,
+            warmup=warmup,
+            counter=counter,
+        )
+        # The innermost outlet is targeted, so only the leaf is rendered.
+        headers = {"HX-Request": "true", "HX-Target": f"level{depth - 1}"}
+        yield measure(
+            f"{name} htmx",
+            lambda: client.get(url, headers=headers),
+            requests=requests,
+            warmup=warmup,
+            counter=counter,
+        )
+
+
+def seed_contacts(rows: int, *, batch_size: int = 10000) -> None:
+    """Add contacts until there are the given number of them."""
+    from . import search
+    from .contacts import Contact
+
+    existing = Contact.objects.count()
+    for start in range(existing, rows, batch_size):
+        contacts = Contact.objects.bulk_create(
+            Contact(
+                first=f"First{i}",
+                last=f"Last{i}",
+                phone=f"555-{i:07}",
+                email=f"contact{i}@example.com",
+            )
+            for i in range(start, min(start + batch_size, rows))
+        )
+        search.index(contacts)
+
+
+def contact_benchmarks(
+    rows: int, *, requests: int, warmup: int, counter: QueryCounter
+) -> Iterator[Result]:
+    """Benchmark the contacts routes against a table of the given size.
+
+    Every cache is a dummy one, so that view and layout caches, and
+    prefetched partials, don't turn the runs into cache hits that cost
+    the same whatever the size of the table.
+    """
+    from .contacts import Contact
+
+    seed_contacts(rows)
+    contact = Contact.objects.order_by("-id").first()
+    assert contact is not None
+    client = Client()
+    headers = {"HX-Request": "true", "HX-Target": "layout"}
+    dummy = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+    with override_settings(CACHES={alias: dummy for alias in settings.CACHES}):
+        for page, url in [
+            ("list", reverse("temploco:contacts")),
+            ("detail", reverse("temploco:contacts-detail", kwargs={"id": contact.pk})),
+        ]:
+            yield measure(
+                f"contacts[rows={rows}] {page} full",
+                lambda: client.get(url),
+                requests=requests,
+                warmup=warmup,
+                counter=counter,
+            )
+            yield measure(
+                f"contacts[rows={rows}] {page} htmx",
+                lambda: client.get(url, headers=headers),
+                requests=requests,
+                warmup=warmup,
+                counter=counter,
+            )
+
+
+def run(
+    *,
+    depths: list[int],
+    fanouts: list[int],
+    layout_sizes: list[int],
+    rows: list[int],
+    requests: int,
+    warmup: int,
+) -> Iterator[Result]:
+    """Run every benchmark in a fresh test database."""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    counter = QueryCounter()
+    try:
+        with counter.installed():
+            for depth in depths:
+                for fanout in fanouts:
+                    for layout_size in layout_sizes:
+                        yield from route_benchmarks(
+                            depth,
+                            fanout,
+                            layout_size,
+                            requests=requests,
+                            warmup=warmup,
+                            counter=counter,
+                        )
+            for count in sorted(rows):
+                yield from contact_benchmarks(
+                    count, requests=requests, warmup=warmup, counter=counter
+                )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def save(results: list[Result], path: str) -> None:
+    with open(path, "w") as file:
+        json.dump([asdict(result) for result in results], file, indent=2)
+
+
+def compare(results: list[Result], path: str, *, tolerance: float) -> list[str]:
+    """Compare results against a saved baseline, and list the regressions.
+
+    Timings and memory may be worse by the tolerance, as a fraction of
+    the baseline, to allow for noise. Query counts are exact.
+    """
+    with open(path) as file:
+        baseline = {result["name"]: Result(**result) for result in json.load(file)}
+    regressions: list[str] = []
+    for result in results:
+        before: Optional[Result] = baseline.get(result.name)
+        if before is None:
+            continue
+        if result.requests_per_second < before.requests_per_second * (1 - tolerance):
+            regressions.append(
+                f"{result.name}: {result.requests_per_second:.1f} requests/s, "
+                f"was {before.requests_per_second:.1f}"
+            )
+        if result.p99_ms > before.p99_ms * (1 + tolerance):
+            regressions.append(
+                f"{result.name}: p99 {result.p99_ms:.2f}ms, was {before.p99_ms:.2f}ms"
+            )
+        if result.allocated_kib > before.allocated_kib * (1 + tolerance):
+            regressions.append(
+                f"{result.name}: {result.allocated_kib:.1f}KiB allocated, "
+                f"was {before.allocated_kib:.1f}KiB"
+            )
+        if result.queries > before.queries:
+            regressions.append(
+                f"{result.name}: {result.queries:g} queries, was {before.queries:g}"
+            )
+    return regressions
@@ -0,0 +1,165 @@
+"""Importing and exporting contacts in bulk, as CSV or NDJSON.
+
+Both directions stream: imports are parsed a line at a time and saved
+in batches, and exports are written from an iterator over the table,
+so neither holds all of the contacts in memory at once.
+"""
+
+from __future__ import annotations
+
+import csv
+import itertools
+import json
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterable, Iterator
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db import router, transaction
+from . import search
+
+FIELDS = ("first", "last", "phone", "email")
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+@dataclass
+class RowError:
+    line: int
+    errors: dict[str, list[str]]
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    errors: list[RowError] = field(default_factory=list[RowError])
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "created": self.created,
+            "errors": [{"line": e.line, "errors": e.errors} for e in self.errors],
+        }
+
+
+Row = tuple[int, dict[str, Any] | RowError]
+
+
+def csv_rows(lines: Iterable[str], /) -> Iterator[Row]:
+    """Parse CSV with a header row naming the fields."""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def ndjson_rows(lines: Iterable[str], /) -> Iterator[Row]:
+    """Parse NDJSON with an object for each contact."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield number, RowError(number, {"__all__": [str(error)]})
+            continue
+        if not isinstance(row, dict):
+            yield number, RowError(number, {"__all__": ["Expected an object."]})
+            continue
+        yield number, row
+
+
+def format_of(name: str | None, /) -> str:
+    """Guess the format of a file from its name, defaulting to CSV."""
+    return "ndjson" if name and name.endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def parse(lines: Iterable[str], format: str, /) -> Iterator[Row]:
+    if format == "csv":
+        return csv_rows(lines)
+    if format == "ndjson":
+        return ndjson_rows(lines)
+    raise Exception(f"Unknown format {format}, expected one of {', '.join(FORMATS)}.")
+
+
+def import_contacts(rows: Iterable[Row], /, *, batch_size: int = 1000) -> ImportReport:
+    """Validate and save contacts, reporting the rows that are invalid.
+
+    Valid rows are saved in batches, each in a transaction of its own,
+    so an import that fails partway keeps the batches before it.
+    """
+    Contact = search.contact_model()
+    using = router.db_for_write(Contact)
+    report = ImportReport()
+    batch: list[Any] = []
+
+    def save() -> None:
+        # bulk_create skips the signals that keep search in sync.
+        with transaction.atomic(using=using):
+            created = Contact.objects.using(using).bulk_create(batch)
+            search.index(created, using=using)
+        report.created += len(created)
+        batch.clear()
+
+    for line, row in rows:
+        if isinstance(row, RowError):
+            report.errors.append(row)
+            continue
+        contact = Contact(**{f: str(row.get(f) or "") for f in FIELDS})
+        try:
+            contact.full_clean(exclude=["updated"])
+        except ValidationError as error:
+            report.errors.append(RowError(line, error.message_dict))
+            continue
+        batch.append(contact)
+        if len(batch) >= batch_size:
+            save()
+    if batch:
+        save()
+    return report
+
+
+class Echo:
+    """A file that returns what's written to it, for streaming CSV."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def export_contacts(
+    format: str, /, *, chunk_size: int = 2000, using: str | None = None
+) -> Iterator[str]:
+    """Serialize every contact, a line at a time."""
+    Contact = search.contact_model()
+    values = (
+        Contact.objects.using(using or router.db_for_read(Contact))
+        .order_by("pk")
+        .values_list(*FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    if format == "csv":
+        writer = csv.writer(Echo())
+        yield writer.writerow(FIELDS)
+        for row in values:
+            yield writer.writerow(row)
+    elif format == "ndjson":
+        for row in values:
+            yield json.dumps(dict(zip(FIELDS, row))) + "\n"
+    else:
+        raise Exception(
+            f"Unknown format {format}, expected one of {', '.join(FORMATS)}."
+        )
+
+
+async def aexport_contacts(
+    format: str, /, *, chunk_size: int = 2000, using: str | None = None
+) -> AsyncIterator[str]:
+    """Serialize every contact, a batch of lines at a time.
+
+    The lines are read in a thread, since querysets can't be iterated in
+    the event loop, and a batch at a time, to keep the hops between them
+    few.
+    """
+    lines = export_contacts(format, chunk_size=chunk_size, using=using)
+
+    def batch() -> str:
+        return "".join(itertools.islice(lines, chunk_size))
+
+    while chunk := await sync_to_async(batch)():
+        yield chunk
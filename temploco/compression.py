@@ -0,0 +1,102 @@
+"""Gzip for pages made of layouts, compressing each layout only once.
+
+A page is a layout's segments with the partial spliced between them.
+Each segment is compressed on its own, as raw deflate data ending on
+a byte boundary, so the compressed segments can be joined into one gzip
+member with a single header and trailer. The compressed segments of a
+layout are kept, so only the partial is compressed for each response.
+
+Brotli can't be joined this way, so it isn't offered.
+"""
+
+from __future__ import annotations
+
+import struct
+import zlib
+from functools import lru_cache
+from typing import AsyncIterable, AsyncIterator, Container, Iterable, Iterator
+from django.http import HttpRequest
+
+# Segments shorter than this are cheap to compress, and likely to vary
+# between responses, like CSRF tokens, so they aren't kept.
+KEEP = 256
+# Responses shorter than this aren't worth compressing.
+MINIMUM = 200
+LEVEL = 6
+
+HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+# An empty final block, which ends the deflate data of the segments.
+END = b"\x03\x00"
+
+
+def accepts_gzip(request: HttpRequest, /) -> bool:
+    encodings = request.headers.get("Accept-Encoding", "")
+    for encoding in encodings.split(","):
+        name, *params = (part.strip() for part in encoding.split(";"))
+        if name.lower() == "gzip":
+            for param in params:
+                key, _, value = param.partition("=")
+                if key.strip() == "q":
+                    try:
+                        return float(value) > 0
+                    except ValueError:
+                        return False
+            return True
+    return False
+
+
+def deflate(data: bytes, /) -> bytes:
+    compressor = zlib.compressobj(LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+# Keyed by the segments themselves, so a layout is only compressed once
+# for as long as it stays the same, however it's cached or composed.
+# Only segments of layouts are kept, since the rest are rarely repeated.
+deflate_kept = lru_cache(maxsize=256)(deflate)
+
+
+class Gzip:
+    """A gzip member, written a segment at a time."""
+
+    def __init__(self) -> None:
+        self.__crc = 0
+        self.__size = 0
+
+    def segment(self, data: bytes, /, *, keep: bool = False) -> bytes:
+        if not data:
+            return b""
+        self.__crc = zlib.crc32(data, self.__crc)
+        self.__size += len(data)
+        return deflate_kept(data) if keep and len(data) >= KEEP else deflate(data)
+
+    def trailer(self) -> bytes:
+        return END + struct.pack("<II", self.__crc, self.__size & 0xFFFFFFFF)
+
+
+def gzip_segments(
+    segments: Iterable[bytes], /, *, kept: Container[bytes] = ()
+) -> Iterator[bytes]:
+    """Compress segments into a gzip member, a chunk for each segment.
+
+    Every chunk ends on a flush, so a streamed page still reaches the
+    client a segment at a time. The compressed copies of the kept
+    segments, those of the layout, are kept for later responses.
+    """
+    gzip = Gzip()
+    yield HEADER
+    for segment in segments:
+        if compressed := gzip.segment(segment, keep=segment in kept):
+            yield compressed
+    yield gzip.trailer()
+
+
+async def agzip_segments(
+    segments: AsyncIterable[bytes], /, *, kept: Container[bytes] = ()
+) -> AsyncIterator[bytes]:
+    gzip = Gzip()
+    yield HEADER
+    async for segment in segments:
+        if compressed := gzip.segment(segment, keep=segment in kept):
+            yield compressed
+    yield gzip.trailer()
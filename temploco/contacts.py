@@ -1,18 +1,38 @@
 from __future__ import annotations
 
-from typing import Union, Callable, Any, Self
+import codecs
+from typing import Union, Callable, Iterable, Iterator, Optional, Any, cast
+from copy import copy
 from http import HTTPStatus
+from urllib.parse import urlsplit
+from asgiref.sync import async_to_sync, sync_to_async
+from inspect import iscoroutinefunction
+from django.core.handlers.asgi import ASGIRequest
 from django.http import (
+    Http404,
     HttpRequest,
     HttpResponse,
     HttpResponseRedirect,
     HttpResponsePermanentRedirect,
+    JsonResponse,
+    QueryDict,
+    StreamingHttpResponse,
 )
-from django.http.response import HttpResponseRedirectBase
-from django.shortcuts import resolve_url, redirect
-from django.db.models import Model, CharField, Q
+from django.http.response import HttpResponseBase, HttpResponseRedirectBase
+from django.shortcuts import aget_object_or_404, resolve_url
+from django.urls import Resolver404, ResolverMatch, get_script_prefix, resolve
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Model, CharField, DateTimeField
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.views.decorators.http import require_POST, require_GET, require_http_methods
-from .layout import LayoutResponse, PartialResponse
+from . import bulk
+from .layout import LayoutResponse, PartialResponse, freshness, invalidate
+from .pagination import apaginate
+from .replicas import overlay
+from .search import search
 
 
 class HttpResponseSeeOtherRedirect(HttpResponseRedirectBase):
@@ -49,25 +69,106 @@ def redirect(
     redirect_class = (
         HttpResponsePermanentRedirect
         if permanent
-        else HttpResponseSeeOtherRedirect
-        if see_other
-        else HttpResponseRedirect
+        else HttpResponseSeeOtherRedirect if see_other else HttpResponseRedirect
     )
     return redirect_class(resolve_url(to, *args, **kwargs))
 
 
+def inline_request(
+    request: HttpRequest, url: str
+) -> Optional[tuple[Callable[..., Any], HttpRequest, ResolverMatch]]:
+    """
+    Return the view, request and match for a GET of a local URL within
+    the current request, or None if the URL can't be safely rendered
+    inline.
+
+    Only URLs handled by a Route are rendered, since those views return
+    partials that are safe to render for GET requests.
+    """
+    if not url_has_allowed_host_and_scheme(url, allowed_hosts={request.get_host()}):
+        return None
+    parts = urlsplit(url)
+    prefix = get_script_prefix()
+    if parts.netloc or not parts.path.startswith(prefix):
+        return None
+    path_info = "/" + parts.path.removeprefix(prefix)
+    try:
+        match = resolve(path_info)
+    except Resolver404:
+        return None
+    if getattr(match.func, "route", None) is None:
+        return None
+
+    get = copy(request)
+    get.method = "GET"
+    get.path = parts.path
+    get.path_info = path_info
+    get.META = {
+        key: value
+        for key, value in request.META.items()
+        # Conditional headers were for the original request.
+        if key not in ("HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE")
+    }
+    get.META.update(REQUEST_METHOD="GET", PATH_INFO=path_info, QUERY_STRING=parts.query)
+    get.GET = QueryDict(parts.query)
+    get.POST = QueryDict()
+    get.resolver_match = match
+    # Inline requests follow a write, so they mustn't use prefetches.
+    setattr(get, "inline", True)
+    return match.func, get, match
+
+
+def inline_get(request: HttpRequest, url: str) -> Optional[HttpResponseBase]:
+    """
+    Return the response for a GET of a local URL, rendered within the
+    current request, or None if the URL can't be safely rendered inline.
+    """
+    if not (inline := inline_request(request, url)):
+        return None
+    view, get, match = inline
+    view = async_to_sync(view) if iscoroutinefunction(view) else view
+    response = view(get, *match.args, **match.kwargs)
+    if response.status_code != HTTPStatus.OK:
+        return None
+    return response
+
+
+async def ainline_get(request: HttpRequest, url: str) -> Optional[HttpResponseBase]:
+    """Return the response for a GET of a local URL, like ``inline_get``."""
+    if not (inline := inline_request(request, url)):
+        return None
+    view, get, match = inline
+    view = view if iscoroutinefunction(view) else sync_to_async(view)
+    response = await view(get, *match.args, **match.kwargs)
+    if response.status_code != HTTPStatus.OK:
+        return None
+    return response
+
+
+def inlined(
+    request: HttpRequest, url: str, response: HttpResponseBase
+) -> HttpResponseBase:
+    # The client shows the URL it was redirected to, in the same target.
+    response["HX-Push-Url"] = url
+    target = request.headers.get("HX-Target")
+    if target and not response.has_header("HX-Retarget"):
+        response["HX-Retarget"] = f"#{target}"
+    return response
+
+
 def hx_redirect(
     request: HttpRequest,
     to: Union[Callable[..., Any], str, Model],
     *args: Any,
     permanent: bool = False,
     see_other: bool = False,
+    inline: bool = False,
     **kwargs: Any,
 ) -> Union[
     HttpResponseRedirect,
     HttpResponsePermanentRedirect,
     HttpResponseSeeOtherRedirect,
-    HttpResponse,
+    HttpResponseBase,
 ]:
     """
     Return an HttpResponseRedirect or an HttpResponse with the HX-Redirect
@@ -84,92 +185,238 @@ def hx_redirect(
 
     Issues a temporary redirect by default; pass permanent=True to issue a
     permanent redirect, or pass see_other=True to issue a see other redirect.
+
+    Pass inline=True to render a local URL within the same htmx request,
+    rather than having the client make another request for it. This
+    falls back to a redirect for URLs that can't be safely rendered.
     """
     if request.headers.get("HX-Request") == "true":
-        # Future: Get response from the redirected URL if local and
-        #         return that inline to avoid additional requests.
-        return HttpResponse(headers={"HX-Redirect": resolve_url(to, *args, **kwargs)})
+        url = resolve_url(to, *args, **kwargs)
+        if inline and (response := inline_get(request, url)):
+            return inlined(request, url, response)
+        return HttpResponse(headers={"HX-Redirect": url})
     return redirect(to, *args, permanent=permanent, see_other=see_other, **kwargs)
 
 
+async def ahx_redirect(
+    request: HttpRequest,
+    to: Union[Callable[..., Any], str, Model],
+    *args: Any,
+    permanent: bool = False,
+    see_other: bool = False,
+    inline: bool = False,
+    **kwargs: Any,
+) -> Union[
+    HttpResponseRedirect,
+    HttpResponsePermanentRedirect,
+    HttpResponseSeeOtherRedirect,
+    HttpResponseBase,
+]:
+    """
+    Return a redirect like ``hx_redirect``, for async views.
+    """
+    if inline and request.headers.get("HX-Request") == "true":
+        url = resolve_url(to, *args, **kwargs)
+        if response := await ainline_get(request, url):
+            return inlined(request, url, response)
+    return hx_redirect(
+        request, to, *args, permanent=permanent, see_other=see_other, **kwargs
+    )
+
+
 class Contact(Model):
     first = CharField(max_length=256)
     last = CharField(max_length=256)
     phone = CharField(max_length=256)
     email = CharField(max_length=256)
+    updated = DateTimeField(auto_now=True)
+
+
+# The tag of cached views that list contacts, rather than show one.
+CONTACT_LIST = "contact-list"
+
+
+def contact_tag(id: int) -> str:
+    return f"contact:{id}"
+
+
+def contact_tags(request: HttpRequest, *, id: Optional[int] = None) -> list[str]:
+    # The list shows every contact, while the pages of a contact only
+    # show that contact.
+    return [CONTACT_LIST] if id is None else [contact_tag(id)]
 
 
-class TerminalLayoutResponse(LayoutResponse):
-    """A layout response that will not compose with parents."""
+@receiver(post_save, sender=Contact)
+@receiver(post_delete, sender=Contact)
+def invalidate_contact(
+    sender: type[Model], instance: Contact, using: str, **kwargs: Any
+) -> None:
+    # Views rendered before the change is committed are still current.
+    tags = (contact_tag(instance.pk), CONTACT_LIST)
+    transaction.on_commit(lambda: invalidate(*tags), using=using)
 
-    def compose(self, parent: LayoutResponse, /) -> Self:
-        return self
 
+def csrf_version(request: HttpRequest) -> str:
+    # The layout only depends on the CSRF token, which is kept valid
+    # for as long as the cookie holding its secret doesn't change.
+    return request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")
 
-def layout(request: HttpRequest) -> LayoutResponse:
-    if request.headers.get("hx-target") == "layout":
-        return TerminalLayoutResponse("")
+
+def contact_version(request: HttpRequest, *, id: int) -> str:
+    updated = Contact.objects.filter(id=id).values_list("updated", flat=True).first()
+    return str(updated)
+
+
+@freshness(etag=csrf_version, private=True)
+async def layout(request: HttpRequest) -> LayoutResponse:
     return LayoutResponse.render(request, "temploco/layout.html")
 
 
 @require_GET
-def contacts(request: HttpRequest) -> PartialResponse:
-    search = request.GET.get("q")
+async def contacts(request: HttpRequest) -> PartialResponse:
+    query = request.GET.get("q")
     contacts = Contact.objects.all()
-    if search is not None:
-        contacts = contacts.filter(
-            Q(first__icontains=search) | Q(last__icontains=search)
+    if query:
+        # Search results are ranked, and then paged in order of rank.
+        # Building the search checks the database for its index.
+        contacts = await sync_to_async(search)(contacts, query)
+        page = await apaginate(request, contacts, ordering=("search_rank", "id"))
+        page.items = await sync_to_async(overlay)(page.items, Contact)
+    else:
+        page = await apaginate(request, contacts, ordering=("id",))
+        # Contacts created since the replica was last up to date come
+        # after all of the others, so they belong on the last page.
+        last = page.next_url is None
+        page.items = await sync_to_async(overlay)(
+            page.items, Contact, include=lambda contact: last
+        )
+    if request.headers.get("HX-Trigger") == "contacts-more":
+        # Infinite scroll only needs the next rows, without any layout.
+        return PartialResponse.render(
+            request,
+            "temploco/contacts/rows.html",
+            {"page": page},
+            layout=LayoutResponse(),
         )
     response = PartialResponse.render(
-        request, "temploco/contacts/index.html", {"contacts": contacts}
+        request,
+        "temploco/contacts/index.html",
+        {"page": page},
+        # The first few contacts are the most likely to be viewed next.
+        prefetch=[f"/contacts/{contact.pk}/" for contact in page.items[:10]],
     )
     return response
 
 
 @require_http_methods(["GET", "POST"])
-def new(request: HttpRequest) -> PartialResponse | HttpResponse:
+async def new(request: HttpRequest) -> PartialResponse | HttpResponseBase:
     if request.method == "POST":
-        Contact.objects.create(
+        await Contact.objects.acreate(
             first=request.POST["first_name"],
             last=request.POST["last_name"],
             phone=request.POST["phone"],
             email=request.POST["email"],
         )
-        return hx_redirect(request, "/contacts/", see_other=True)
+        return await ahx_redirect(request, "/contacts/", see_other=True, inline=True)
     return PartialResponse.render(
         request, "temploco/contacts/new.html", {"contact": Contact()}
     )
 
 
+def every_contact() -> Iterator[dict[str, Any]]:
+    # The URL kwargs of the page of every contact, to render in advance.
+    for id in Contact.objects.values_list("id", flat=True).iterator():
+        yield {"id": id}
+
+
+@freshness(etag=contact_version, private=True)
 @require_http_methods(["GET", "DELETE"])
-def detail(request: HttpRequest, *, id: int) -> PartialResponse | HttpResponse:
+async def detail(
+    request: HttpRequest, *, id: int
+) -> PartialResponse | HttpResponseBase:
     if request.method == "DELETE":
-        Contact.objects.filter(id=id).delete()
-        return hx_redirect(request, "/contacts/", see_other=True)
-    contact = Contact.objects.get(id=id)
+        await Contact.objects.filter(id=id).adelete()
+        return await ahx_redirect(request, "/contacts/", see_other=True, inline=True)
+    contact = await aget_object_or_404(Contact, id=id)
     return PartialResponse.render(
         request, "temploco/contacts/show.html", {"contact": contact}
     )
 
 
+@require_GET
+async def related(request: HttpRequest, *, id: int) -> PartialResponse:
+    contact = await aget_object_or_404(Contact, id=id)
+    related = []
+    if contact.last:
+        others = Contact.objects.exclude(id=id)
+        matches = await sync_to_async(search)(others, contact.last)
+        related = [c async for c in matches.order_by("search_rank", "id")[:10]]
+    return PartialResponse.render(
+        request, "temploco/contacts/related.html", {"contacts": related}
+    )
+
+
+@freshness(etag=contact_version, private=True)
 @require_http_methods(["GET", "POST"])
-def edit(request: HttpRequest, *, id: int) -> PartialResponse | HttpResponse:
+async def edit(request: HttpRequest, *, id: int) -> PartialResponse | HttpResponseBase:
     if request.method == "POST":
-        contact = Contact.objects.get(id=id)
+        contact = await aget_object_or_404(Contact, id=id)
         contact.first = request.POST["first_name"]
         contact.last = request.POST["last_name"]
         contact.phone = request.POST["phone"]
         contact.email = request.POST["email"]
-        contact.save()
-        return hx_redirect(request, f"/contacts/{contact.pk}/", see_other=True)
-    contact = Contact.objects.get(id=id)
+        await contact.asave()
+        return await ahx_redirect(
+            request, f"/contacts/{contact.pk}/", see_other=True, inline=True
+        )
+    contact = await aget_object_or_404(Contact, id=id)
     return PartialResponse.render(
         request, "temploco/contacts/edit.html", {"contact": contact}
     )
 
 
 @require_POST
-def delete(request: HttpRequest, *, id: int) -> HttpResponse:
-    contact = Contact.objects.get(id=id)
-    contact.delete()
-    return hx_redirect(request, "/contacts", see_other=True)
+async def delete(request: HttpRequest, *, id: int) -> HttpResponseBase:
+    contact = await aget_object_or_404(Contact, id=id)
+    await contact.adelete()
+    return await ahx_redirect(request, "/contacts/", see_other=True, inline=True)
+
+
+@require_GET
+def export(request: HttpRequest, *, format: str) -> StreamingHttpResponse:
+    if format not in bulk.FORMATS:
+        raise Http404(f"Contacts can't be exported as {format}.")
+    # Django reads the whole of a sync iterator before sending any of it
+    # under ASGI, so the export has to be async there.
+    if isinstance(request, ASGIRequest):
+        content: Any = bulk.aexport_contacts(format)
+    else:
+        content = bulk.export_contacts(format)
+    return StreamingHttpResponse(
+        content,
+        content_type=bulk.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="contacts.{format}"'},
+    )
+
+
+@require_POST
+def import_(request: HttpRequest) -> JsonResponse:
+    upload = request.FILES.get("file")
+    if upload is None:
+        return JsonResponse(
+            {"error": "No file was uploaded."}, status=HTTPStatus.BAD_REQUEST
+        )
+    format = request.POST.get("format") or bulk.format_of(upload.name)
+    if format not in bulk.FORMATS:
+        return JsonResponse(
+            {"error": f"Unknown format {format}."}, status=HTTPStatus.BAD_REQUEST
+        )
+    # Uploads are iterated a line at a time, and large ones are already
+    # streamed to a temporary file, so the whole upload is never in memory.
+    # Uploads are opened in binary mode, so their lines are bytes.
+    lines = codecs.iterdecode(cast("Iterable[bytes]", upload), "utf-8-sig")
+    report = bulk.import_contacts(bulk.parse(lines, format))
+    if report.created:
+        # Contacts created in bulk skip the signals that invalidate views.
+        invalidate(CONTACT_LIST)
+    return JsonResponse(report.as_dict())
@@ -1,11 +1,69 @@
 from __future__ import annotations
 
-from typing import Callable, Optional, Any, Self
-from dataclasses import dataclass
-from django.http import HttpRequest, HttpResponse
+import asyncio
+import itertools
+import re
+from typing import (
+    Callable,
+    Awaitable,
+    AsyncIterable,
+    Coroutine,
+    Generator,
+    Iterable,
+    Iterator,
+    AsyncIterator,
+    Optional,
+    Any,
+    Self,
+    TypeVar,
+    cast,
+)
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from contextvars import ContextVar, copy_context
+from copy import copy
+from dataclasses import dataclass, replace
+from functools import wraps
+from hashlib import md5, sha256
+from http import HTTPStatus
+from inspect import iscoroutinefunction
+from secrets import token_hex
+from urllib.parse import urlsplit
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.exceptions import BadRequest, PermissionDenied, SuspiciousOperation
+from django.core.cache import caches, DEFAULT_CACHE_ALIAS
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.http import (
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
+from django.http.response import HttpResponseBase
+from django.middleware.csrf import get_token
 from django.template import loader
-from django.urls.resolvers import URLPattern, URLResolver
-from django.urls import path, re_path, include
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+from django.urls.resolvers import URLPattern, URLResolver, RoutePattern
+from django.urls import Resolver404, path, include, resolve, reverse
+from django.utils.cache import (
+    add_never_cache_headers,
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from .compression import MINIMUM, accepts_gzip, agzip_segments, gzip_segments
+from .timing import fallback_rendered, timed, timer
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def template_name_of(template_name: list[str] | str, /) -> str:
+    return template_name if isinstance(template_name, str) else template_name[0]
 
 
 class LayoutResponse:
@@ -34,15 +92,55 @@ class LayoutResponse:
     """
 
     __DIVIDER = "<django-layout></django-layout>"
+    __CSRF_SLOT = "<django-csrf-token></django-csrf-token>"
+    __VERSION_SLOT = "django-layout-version:"
+    __SLOTS = re.compile(
+        f'({re.escape(__CSRF_SLOT)}| data-version="{__VERSION_SLOT}[^"]*")'
+    )
+    __deferring_csrf: ContextVar[bool] = ContextVar("deferring_csrf", default=False)
 
     def __init__(self, content: Optional[str] = None):
-        self.__content = content or self.__DIVIDER
+        # The content is kept as the segments before and after the
+        # outlet, so composing and filling layouts never copies or
+        # searches the whole page again.
+        content = content or self.__DIVIDER
+        index = content.find(self.__DIVIDER)
+        end = index + len(self.__DIVIDER)
+        if index < 0 or content.find(self.__DIVIDER, end) >= 0:
+            raise Exception(
+                "A layout must have exactly one outlet, "
+                f"but this one has {content.count(self.__DIVIDER)}."
+            )
+        self.__prefix = (content[:index],) if index else ()
+        self.__suffix = (content[end:],) if end < len(content) else ()
 
-    def compose(self, parent: LayoutResponse, /) -> Self:
-        return LayoutResponse(parent.fill(self.__content))
+    def compose(self, parent: LayoutResponse, /) -> LayoutResponse:
+        with timed("compose"):
+            composed = LayoutResponse()
+            composed.__prefix = parent.__prefix + self.__prefix
+            composed.__suffix = self.__suffix + parent.__suffix
+        return composed
 
     def fill(self, content: str, /) -> str:
-        return self.__content.replace(self.__DIVIDER, content)
+        with timed("compose"):
+            return "".join(self.segments(content))
+
+    def segments(self, content: str, /) -> tuple[str, ...]:
+        """The segments of the layout, filled with content."""
+        return (*self.__prefix, content, *self.__suffix)
+
+    @classmethod
+    def before_outlet(cls, content: str, /) -> Self:
+        """A layout of just some content, followed by its outlet."""
+        return cls(content + cls.__DIVIDER)
+
+    def split(self) -> tuple[tuple[str, ...], tuple[str, ...]]:
+        """Split the layout into the segments before and after the outlet.
+
+        This lets the part of the layout before the outlet be sent to
+        the client before the content that fills the outlet is ready.
+        """
+        return self.__prefix, self.__suffix
 
     @classmethod
     def render(
@@ -52,22 +150,136 @@ class LayoutResponse:
         context: Optional[dict[str, Any]] = None,
         using: Optional[str] = None,
     ):
-        context = context or {}
+        context = cls.csrf_context(context)
         context.setdefault("__outlet_divider__", cls.__DIVIDER)
-        content = loader.render_to_string(template_name, context, request, using=using)
+        if cls.__deferring_csrf.get():
+            versions: Any = VersionSlots(cls.__VERSION_SLOT)
+        else:
+            versions = outlet_versions.get() or {}
+        context.setdefault("__outlet_versions__", versions)
+        with timed("render", template_name_of(template_name)):
+            content = loader.render_to_string(
+                template_name, context, request, using=using
+            )
         return cls(content)
 
+    @classmethod
+    @contextmanager
+    def deferring_csrf(cls) -> Generator[None, None, None]:
+        """Render layouts with a slot where the CSRF token would go.
+
+        Layouts rendered this way can be shared between requests, as
+        long as the slot is filled with ``with_csrf_token`` before use.
+        Partials rendered this way get the slot too, for whole pages that
+        are shared, which are filled with ``fill_csrf_token``. The
+        versions of outlets, which depend on the request, are deferred
+        the same way.
+        """
+        token = cls.__deferring_csrf.set(True)
+        try:
+            yield
+        finally:
+            cls.__deferring_csrf.reset(token)
+
+    @classmethod
+    def csrf_context(cls, context: Optional[dict[str, Any]], /) -> dict[str, Any]:
+        """The context for a template, with the CSRF slot if deferring."""
+        context = context or {}
+        if cls.__deferring_csrf.get():
+            context.setdefault("csrf_token", mark_safe(cls.__CSRF_SLOT))
+        return context
+
+    @classmethod
+    def __fill_slot(
+        cls, slot: str, request: HttpRequest, versions: dict[str, str], /
+    ) -> str:
+        if slot == cls.__CSRF_SLOT:
+            return str(get_token(request))
+        outlet = slot.split(cls.__VERSION_SLOT, 1)[1].rstrip('"')
+        version = versions.get(outlet)
+        return format_html(' data-version="{}"', version) if version else ""
+
+    @classmethod
+    def fill_csrf_token(cls, content: str, request: HttpRequest, /) -> str:
+        """Fill any CSRF token slot in content with the token for this request.
+
+        The versions of outlets aren't known outside of their route, so
+        they're left out.
+        """
+        if cls.__deferring_csrf.get():
+            return content
+        if cls.__CSRF_SLOT not in content and cls.__VERSION_SLOT not in content:
+            return content
+        return cls.__SLOTS.sub(
+            lambda match: cls.__fill_slot(match.group(), request, {}), content
+        )
+
+    def with_csrf_token(self, request: HttpRequest, /) -> Self:
+        """Fill any CSRF token slot with the token for this request.
+
+        The slots for the versions of outlets are filled too.
+        """
+        if self.__deferring_csrf.get():
+            # The slot is still wanted, such as for a whole shared page.
+            return self
+        if not any(
+            self.__CSRF_SLOT in s or self.__VERSION_SLOT in s
+            for s in self.__prefix + self.__suffix
+        ):
+            return self
+        versions = outlet_versions.get() or {}
+
+        def filled(segments: tuple[str, ...]) -> tuple[str, ...]:
+            # Each slot gets a segment of its own, so the segments around
+            # them stay the same between requests, and so can be
+            # compressed once for all of them.
+            return tuple(
+                part
+                for s in segments
+                for i, chunk in enumerate(self.__SLOTS.split(s))
+                for part in (
+                    (self.__fill_slot(chunk, request, versions),) if i % 2 else (chunk,)
+                )
+                if part
+            )
+
+        layout = copy(self)
+        layout.__prefix = filled(self.__prefix)
+        layout.__suffix = filled(self.__suffix)
+        return layout
+
+
+class VersionSlots:
+    """Slots for the versions of outlets, in layouts that are shared."""
+
+    def __init__(self, prefix: str, /):
+        self.__prefix = prefix
+
+    def get(self, outlet: str, default: Any = None) -> str:
+        return f"{self.__prefix}{outlet}"
+
+
+Content = str | Iterable[str] | AsyncIterable[str]
+
 
 @dataclass
 class PartialResponse:
-    """A partial response ready to add combine with layouts."""
+    """A partial response ready to add combine with layouts.
+
+    The content may be an iterator or async iterator of chunks instead,
+    such as rows rendered from ``queryset.iterator(chunk_size=...)``, for
+    content too big to build at once. The page is then streamed, with the
+    chunks between the segments of its layout, as they're produced.
+    """
 
-    content: str = ""
+    content: Content = ""
     content_type: Optional[str] = None
     status: Optional[int] = None
     charset: Optional[str] = None
     headers: Optional[dict[str, str]] = None
     layout: Optional[LayoutResponse] = None
+    oob: Optional[dict[str, PartialResponse]] = None
+    prefetch: Optional[list[str]] = None
 
     @classmethod
     def render(
@@ -82,9 +294,24 @@ class PartialResponse:
         charset: Optional[str] = None,
         headers: Optional[dict[str, str]] = None,
         layout: Optional[LayoutResponse] = None,
+        oob: Optional[dict[str, PartialResponse]] = None,
+        prefetch: Optional[list[str]] = None,
     ):
-        """Render a template to a PartialResponse."""
-        content = loader.render_to_string(template_name, context, request, using=using)
+        """Render a template to a PartialResponse.
+
+        Other regions of the page can be updated in the same htmx
+        response by giving partials for them in oob, keyed by the id of
+        the element to swap them into. If the id is the name of an outlet
+        of the route, the partial is filled into the layouts below it.
+
+        The URLs in prefetch are where the page is likely to go next. The
+        client is told to prefetch those handled by a prefetching route.
+        """
+        context = LayoutResponse.csrf_context(context)
+        with timed("render", template_name_of(template_name)):
+            content = loader.render_to_string(
+                template_name, context, request, using=using
+            )
         return cls(
             content,
             content_type,
@@ -92,88 +319,1525 @@ class PartialResponse:
             charset=charset,
             headers=headers,
             layout=layout,
+            oob=oob,
+            prefetch=prefetch,
+        )
+
+    @property
+    def streaming(self) -> bool:
+        return not isinstance(self.content, str)
+
+    def with_csrf_token(self, request: HttpRequest, /) -> PartialResponse:
+        """Fill any CSRF token slot with the token for this request.
+
+        The partial is copied, so a partial that's shared stays as it was.
+        Streaming content is rendered as it's sent, so it has no slots.
+        """
+        return replace(
+            self,
+            content=(
+                LayoutResponse.fill_csrf_token(self.content, request)
+                if isinstance(self.content, str)
+                else self.content
+            ),
+            layout=self.layout and self.layout.with_csrf_token(request),
+            oob=self.oob
+            and {
+                target: partial.with_csrf_token(request)
+                for target, partial in self.oob.items()
+            },
+        )
+
+
+# Layouts and views of routes, which may be sync or async functions.
+LayoutFunction = Callable[..., LayoutResponse | Awaitable[LayoutResponse]]
+ViewResult = HttpResponseBase | PartialResponse
+ViewFunction = Callable[..., ViewResult | Awaitable[ViewResult]]
+
+
+def chunks_of(content: Content, /) -> Iterator[str]:
+    if isinstance(content, str):
+        yield content
+    elif isinstance(content, AsyncIterable):
+        raise Exception("Async content can only be streamed by async routes.")
+    else:
+        yield from content
+
+
+async def achunks_of(content: Content, /) -> AsyncIterator[str]:
+    if isinstance(content, str):
+        yield content
+    elif isinstance(content, AsyncIterable):
+        async for chunk in content:
+            yield chunk
+    else:
+        # Iterators over querysets can't run in the event loop.
+        chunks = iter(content)
+        while (chunk := await sync_to_async(next)(chunks, None)) is not None:
+            yield chunk
+
+
+def joined(content: Content, /) -> str:
+    """The whole of some content, however it's chunked."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, AsyncIterable):
+
+        async def ajoined() -> str:
+            return "".join([chunk async for chunk in content])
+
+        return async_to_sync(ajoined)()
+    return "".join(content)
+
+
+def streamable(
+    request: HttpRequest, chunks: Iterable[str] | AsyncIterable[str], /
+) -> Iterable[str] | AsyncIterable[str]:
+    """Adapt chunks to the server, so that they're sent as they come.
+
+    Under ASGI, Django reads the whole of a sync iterator before sending
+    any of it, so its chunks are pulled from a thread one at a time.
+    """
+    if isinstance(request, ASGIRequest) and not isinstance(chunks, AsyncIterable):
+        return achunks_of(chunks)
+    return chunks
+
+
+async def auser(request: HttpRequest, /) -> Any:
+    """The user of a request, if it has one, from async code."""
+    auser = getattr(request, "auser", None)
+    return await auser() if auser else None
+
+
+@dataclass(frozen=True)
+class LayoutCache:
+    """How to cache the layout of a route.
+
+    A cached layout is shared by every request with the same values for
+    what it varies on: the user, the given request headers, and the URL
+    kwargs. Anything else the layout uses must be the same for everyone.
+    The CSRF token is the exception, since it's left as a slot in the
+    cached layout and filled in for each request after the lookup.
+
+    The timeout is in seconds, and defaults to the timeout of the cache.
+    """
+
+    timeout: Optional[int] = None
+    vary_on_user: bool = False
+    vary_on_headers: tuple[str, ...] = ()
+    vary_on_kwargs: bool = True
+    alias: str = DEFAULT_CACHE_ALIAS
+    key_prefix: Optional[str] = None
+
+    def key(
+        self,
+        layout: LayoutFunction,
+        request: HttpRequest,
+        kwargs: dict[str, Any],
+        user: Any,
+        /,
+    ) -> str:
+        parts = [self.key_prefix or f"{layout.__module__}.{layout.__qualname__}"]
+        if self.vary_on_user:
+            parts.append(str(user.pk))
+        parts.extend(request.headers.get(header, "") for header in self.vary_on_headers)
+        if self.vary_on_kwargs:
+            parts.append(repr(sorted(kwargs.items())))
+        digest = md5("\n".join(parts).encode(), usedforsecurity=False).hexdigest()
+        return f"temploco.layout.{digest}"
+
+    def wrap(self, layout: LayoutFunction, /) -> LayoutFunction:
+        """Wrap a layout so that its responses are cached."""
+        timeout = DEFAULT_TIMEOUT if self.timeout is None else self.timeout
+
+        if iscoroutinefunction(layout):
+
+            @wraps(layout)
+            async def acached(request: HttpRequest, **kwargs: Any) -> LayoutResponse:
+                cache = caches[self.alias]
+                user = await auser(request) if self.vary_on_user else None
+                key = self.key(layout, request, kwargs, user)
+                response = await cache.aget(key)
+                if response is None:
+                    with LayoutResponse.deferring_csrf():
+                        response = await layout(request, **kwargs)
+                    await cache.aset(key, response, timeout)
+                return response.with_csrf_token(request)
+
+            return acached
+
+        render = cast("Callable[..., LayoutResponse]", layout)
+
+        @wraps(layout)
+        def cached(request: HttpRequest, **kwargs: Any) -> LayoutResponse:
+            cache = caches[self.alias]
+            key = self.key(layout, request, kwargs, getattr(request, "user", None))
+            response = cache.get(key)
+            if response is None:
+                with LayoutResponse.deferring_csrf():
+                    response = render(request, **kwargs)
+                cache.set(key, response, timeout)
+            return response.with_csrf_token(request)
+
+        return cached
+
+
+# The headers of htmx requests that views may render differently for.
+HX_HEADERS = ("HX-Request", "HX-Boosted", "HX-Target", "HX-Trigger")
+
+
+def tag_key(tag: str, /) -> str:
+    return f"temploco.tag.{md5(tag.encode(), usedforsecurity=False).hexdigest()}"
+
+
+def invalidate(*tags: str, alias: str = DEFAULT_CACHE_ALIAS) -> None:
+    """Invalidate the views cached with any of the tags.
+
+    Each tag has a version, which changes here, and cached views are only
+    used while their tags still have the versions they were cached with.
+    """
+    caches[alias].set_many({tag_key(tag): token_hex(8) for tag in tags}, None)
+
+
+def tag_versions(cache: Any, tags: Iterable[str], /) -> dict[str, str]:
+    keys = [tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # The tag was never invalidated, or its version was evicted.
+            version = token_hex(8)
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+            versions[key] = version
+    return versions
+
+
+async def atag_versions(cache: Any, tags: Iterable[str], /) -> dict[str, str]:
+    keys = [tag_key(tag) for tag in tags]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = token_hex(8)
+            if not await cache.aadd(key, version, None):
+                version = await cache.aget(key, version)
+            versions[key] = version
+    return versions
+
+
+@dataclass(frozen=True)
+class ViewCache:
+    """How to cache the partials of the view of a route.
+
+    A cached partial is shared by every request for the same route, URL
+    kwargs and query string, with the same values for what it varies on:
+    the htmx headers, the user, the given request headers, and those that
+    the freshness of the view varies on. As with ``LayoutCache``, the
+    CSRF token is left as a slot and filled in for each request.
+
+    The tags function takes the same arguments as the view, and names
+    the data that the partial shows. ``invalidate`` drops every partial
+    with any of the given tags, such as when that data is saved. The
+    versions of the tags are read before the view runs, so a partial
+    rendered while its data was changing is never used.
+
+    Requests that bypass accepts neither use nor fill the cache. Only
+    GETs of partials with a 200 are cached, without streaming content or
+    partials for other regions. Partials are rendered within the context
+    manager that filling returns, if given, such as to read the data for
+    a partial that's shared from where it's up to date.
+    """
+
+    timeout: Optional[int] = None
+    tags: Optional[Callable[..., Iterable[str]]] = None
+    bypass: Optional[Callable[[HttpRequest], bool]] = None
+    filling: Optional[Callable[[], AbstractContextManager[Any]]] = None
+    vary_on_user: bool = False
+    vary_on_headers: tuple[str, ...] = ()
+    alias: str = DEFAULT_CACHE_ALIAS
+    key_prefix: Optional[str] = None
+
+    def key(
+        self,
+        view: ViewFunction,
+        request: HttpRequest,
+        kwargs: dict[str, Any],
+        user: Any,
+        /,
+    ) -> str:
+        match = request.resolver_match
+        name = match.view_name if match else f"{view.__module__}.{view.__qualname__}"
+        parts = [self.key_prefix or name]
+        if self.vary_on_user:
+            parts.append(str(user.pk))
+        view_freshness = getattr(view, "freshness", None)
+        headers = (
+            *HX_HEADERS,
+            *self.vary_on_headers,
+            *(view_freshness.vary_on_headers if view_freshness else ()),
+        )
+        parts.extend(request.headers.get(header, "") for header in headers)
+        parts.append(repr(sorted(kwargs.items())))
+        parts.append(repr(sorted(request.GET.lists())))
+        digest = md5("\n".join(parts).encode(), usedforsecurity=False).hexdigest()
+        return f"temploco.view.{digest}"
+
+    def wrap(self, view: ViewFunction, /) -> ViewFunction:
+        """Wrap a view so that the partials it renders are cached."""
+        timeout = DEFAULT_TIMEOUT if self.timeout is None else self.timeout
+
+        def skip(request: HttpRequest) -> bool:
+            return request.method not in ("GET", "HEAD") or bool(
+                self.bypass and self.bypass(request)
+            )
+
+        def keep(response: ViewResult) -> bool:
+            return (
+                isinstance(response, PartialResponse)
+                and not response.streaming
+                and not response.oob
+                and response.status in (None, HTTPStatus.OK)
+            )
+
+        def filling() -> AbstractContextManager[Any]:
+            return self.filling() if self.filling else nullcontext()
+
+        def filled(request: HttpRequest, response: ViewResult) -> ViewResult:
+            if isinstance(response, PartialResponse):
+                return response.with_csrf_token(request)
+            return response
+
+        if iscoroutinefunction(view):
+
+            @wraps(view)
+            async def acached(request: HttpRequest, **kwargs: Any) -> ViewResult:
+                if skip(request):
+                    return await view(request, **kwargs)
+                cache = caches[self.alias]
+                user = await auser(request) if self.vary_on_user else None
+                key = self.key(view, request, kwargs, user)
+                tags = self.tags(request, **kwargs) if self.tags else ()
+                versions = await atag_versions(cache, tags)
+                entry = await cache.aget(key)
+                if entry is not None and entry[0] == versions:
+                    return filled(request, entry[1])
+                with LayoutResponse.deferring_csrf(), filling():
+                    response = await view(request, **kwargs)
+                if keep(response):
+                    await cache.aset(key, (versions, response), timeout)
+                return filled(request, response)
+
+            return acached
+
+        render = cast("Callable[..., ViewResult]", view)
+
+        @wraps(view)
+        def cached(request: HttpRequest, **kwargs: Any) -> ViewResult:
+            if skip(request):
+                return render(request, **kwargs)
+            cache = caches[self.alias]
+            key = self.key(view, request, kwargs, getattr(request, "user", None))
+            tags = self.tags(request, **kwargs) if self.tags else ()
+            versions = tag_versions(cache, tags)
+            entry = cache.get(key)
+            if entry is not None and entry[0] == versions:
+                return filled(request, entry[1])
+            with LayoutResponse.deferring_csrf(), filling():
+                response = render(request, **kwargs)
+            if keep(response):
+                cache.set(key, (versions, response), timeout)
+            return filled(request, response)
+
+        return cached
+
+
+# Errors that Django turns into responses of their own, rather than
+# errors of the part of the page that raised them.
+PASSED_ON = (Http404, PermissionDenied, BadRequest, SuspiciousOperation)
+
+# Parts with a deadline run in these threads, and run on in them when
+# they miss it. The executor of the event loop won't do, since a sync
+# request's loop waits for its threads to finish before responding.
+stragglers = ThreadPoolExecutor(max_workers=32, thread_name_prefix="temploco-boundary")
+
+# The parts of the page being served that fell back, if any.
+fallen: ContextVar[Optional[list[str]]] = ContextVar("fallen", default=None)
+
+
+@dataclass(frozen=True)
+class Boundary:
+    """What to render in place of a layout or view of a route that fails.
+
+    The fallback is a template, rendered with the URL kwargs, the error,
+    and the nearest named outlet above the part that failed, so that it
+    can reload that outlet; or a function that takes the request and URL
+    kwargs like a view, and returns a PartialResponse.
+
+    With a deadline, in seconds, parts that take longer fall back too.
+    Those parts run in a thread of their own, async parts with a loop of
+    their own there, so the sync work that they wait on runs in that
+    thread too, rather than holding up the request's thread. A part that
+    misses its deadline keeps running in its thread, but the page doesn't
+    wait for it. Deadlines can only be kept asynchronously, so routes
+    with them are served asynchronously.
+    """
+
+    fallback: str | Callable[..., PartialResponse]
+    deadline: Optional[float] = None
+
+    def render(
+        self,
+        request: HttpRequest,
+        kwargs: dict[str, Any],
+        /,
+        *,
+        error: Exception,
+        outlet: Optional[str],
+    ) -> PartialResponse:
+        if callable(self.fallback):
+            return self.fallback(request, **kwargs)
+        context = {**kwargs, "error": error, "outlet": outlet}
+        return PartialResponse.render(request, self.fallback, context)
+
+    def bound(
+        self,
+        func: Callable[..., Any],
+        /,
+        *,
+        part: str,
+        outlet: Optional[str],
+        layout: bool = False,
+    ) -> Callable[..., Any]:
+        """Wrap a layout or view, so that it falls back when it fails."""
+
+        def fall_back(
+            request: HttpRequest, kwargs: dict[str, Any], error: Exception
+        ) -> LayoutResponse | PartialResponse:
+            with timed("fallback", part):
+                partial = self.render(request, kwargs, error=error, outlet=outlet)
+            if (parts := fallen.get()) is not None:
+                parts.append(part)
+            fallback_rendered.send(Boundary, request=request, part=part, error=error)
+            if layout:
+                # A layout is split around its outlet, so it can't be chunked.
+                return LayoutResponse.before_outlet(joined(partial.content))
+            return partial
+
+        def run(request: HttpRequest, kwargs: dict[str, Any]) -> Any:
+            # In a thread of stragglers. The thread-sensitive sync work of
+            # an async part runs in this thread, where it's waited on.
+            try:
+                if iscoroutinefunction(func):
+                    return async_to_sync(func)(request, **kwargs)
+                return func(request, **kwargs)
+            finally:
+                close_old_connections()
+
+        if self.deadline is not None:
+
+            @wraps(func)
+            async def adeadlined(request: HttpRequest, **kwargs: Any) -> Any:
+                # A part that's too slow is left to finish in its thread,
+                # since sync code can't be stopped.
+                context = copy_context()
+                call = asyncio.get_running_loop().run_in_executor(
+                    stragglers, lambda: context.run(run, request, kwargs)
+                )
+                try:
+                    return await asyncio.wait_for(call, self.deadline)
+                except asyncio.TimeoutError:
+                    error = TimeoutError(f"Missed the deadline of {self.deadline}s.")
+                except PASSED_ON:
+                    raise
+                except Exception as raised:
+                    error = raised
+                return await concurrently(fall_back)(request, kwargs, error)
+
+            return adeadlined
+
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def abounded(request: HttpRequest, **kwargs: Any) -> Any:
+                try:
+                    return await func(request, **kwargs)
+                except PASSED_ON:
+                    raise
+                except Exception as error:
+                    return await concurrently(fall_back)(request, kwargs, error)
+
+            return abounded
+
+        @wraps(func)
+        def bounded(request: HttpRequest, **kwargs: Any) -> Any:
+            try:
+                return func(request, **kwargs)
+            except PASSED_ON:
+                raise
+            except Exception as error:
+                return fall_back(request, kwargs, error)
+
+        return bounded
+
+
+@dataclass(frozen=True)
+class Freshness:
+    """How fresh the content of a layout or a view is.
+
+    The etag function takes the same arguments as the layout or view,
+    and returns a version of the data that it depends on. It should be
+    much cheaper than the layout or view itself, since it's called
+    before them to check whether the client already has the page.
+
+    A max_age of None places no limit on how long the content may be
+    cached, and private content may only be cached by the client.
+    """
+
+    etag: Optional[Callable[..., str]] = None
+    max_age: Optional[int] = 0
+    private: bool = False
+    vary_on_headers: tuple[str, ...] = ()
+
+
+# Layouts that never change, such as the default empty layout.
+STATIC = Freshness(etag=lambda *a, **kw: "", max_age=None)
+
+
+def freshness(
+    *,
+    etag: Optional[Callable[..., str]] = None,
+    max_age: Optional[int] = 0,
+    private: bool = False,
+    vary_on_headers: tuple[str, ...] = (),
+) -> Callable[[F], F]:
+    """Declare the freshness of a layout or a view for its route."""
+
+    def decorator(func: F) -> F:
+        setattr(
+            func,
+            "freshness",
+            Freshness(
+                etag=etag,
+                max_age=max_age,
+                private=private,
+                vary_on_headers=vary_on_headers,
+            ),
+        )
+        return func
+
+    return decorator
+
+
+def vary_on(response: HttpResponseBase, headers: Iterable[str], /) -> None:
+    # The stubs of patch_vary_headers only take one header at a time.
+    for header in headers:
+        patch_vary_headers(response, (header,))
+
+
+@dataclass(frozen=True)
+class CacheHeaders:
+    """The cache headers for a page, combined from all of its parts.
+
+    The ETag is only strong if every part of the page has a version,
+    and the Cache-Control is the strictest of all of the parts.
+    """
+
+    etag: Optional[str]
+    max_age: Optional[int]
+    private: bool
+    vary_on_headers: tuple[str, ...]
+
+    @classmethod
+    def negotiate(
+        cls,
+        request: HttpRequest,
+        parts: Iterable[tuple[Optional[Freshness], dict[str, Any]]],
+        /,
+        *,
+        identity: str = "",
+    ) -> Optional[CacheHeaders]:
+        """Combine the freshness of the parts of a page.
+
+        If any part doesn't declare its freshness, then nothing can be
+        said about the page as a whole, and None is returned.
+
+        The identity of the page, such as the name of its view, is part
+        of the ETag, so pages of different views with the same versions
+        don't share ETags.
+        """
+        versions: Optional[list[str]] = []
+        max_age: Optional[int] = None
+        private = False
+        vary_on_headers: list[str] = []
+        for part, kwargs in parts:
+            if part is None:
+                return None
+            if versions is not None and part.etag is not None:
+                versions.append(part.etag(request, **kwargs))
+            elif part.etag is None:
+                versions = None
+            if part.max_age is not None:
+                max_age = (
+                    part.max_age if max_age is None else min(max_age, part.max_age)
+                )
+            private = private or part.private
+            vary_on_headers.extend(part.vary_on_headers)
+        etag = None
+        if versions is not None:
+            headers = [request.headers.get(header, "") for header in vary_on_headers]
+            digest = sha256(
+                "\0".join([identity, *versions, *headers]).encode()
+            ).hexdigest()
+            etag = f'"{digest}"'
+        return cls(etag, max_age, private, tuple(vary_on_headers))
+
+    def not_modified(self, request: HttpRequest, /) -> Optional[HttpResponse]:
+        """The response if the client's copy is still current."""
+        if self.etag is None:
+            return None
+        response = get_conditional_response(request, etag=self.etag)
+        if response is not None:
+            self.apply(response)
+        return response
+
+    def apply(self, response: HttpResponseBase, /) -> None:
+        if response.status_code not in (HTTPStatus.OK, HTTPStatus.NOT_MODIFIED):
+            return
+        if self.etag is not None and not response.has_header("ETag"):
+            response["ETag"] = self.etag
+        if self.max_age is not None:
+            patch_cache_control(response, max_age=self.max_age)
+        if self.private:
+            patch_cache_control(response, private=True)
+        else:
+            patch_cache_control(response, public=True)
+        vary_on(response, self.vary_on_headers)
+
+
+LayoutCall = tuple[LayoutFunction, dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class Level:
+    """A layout in a compiled route, with the URL kwargs it receives.
+
+    Each layout receives the kwargs from its own path and from the
+    paths of its ancestors, so the kwargs of the leaf view are split
+    between the levels without resolving the path again.
+    """
+
+    layout: LayoutFunction
+    params: frozenset[str]
+    freshness: Optional[Freshness] = None
+    outlet: Optional[str] = None
+
+    def kwargs(self, kwargs: dict[str, Any], /) -> dict[str, Any]:
+        return {k: v for k, v in kwargs.items() if k in self.params}
+
+    def call(self, kwargs: dict[str, Any], /) -> LayoutCall:
+        return self.layout, self.kwargs(kwargs)
+
+
+def targeted(chain: tuple[Level, ...], request: HttpRequest, /) -> tuple[Level, ...]:
+    """The part of a compiled route below the outlet that htmx targets.
+
+    Only the content of the targeted outlet is sent, so the layouts
+    that own that outlet and any above it aren't run at all.
+    """
+    target = request.headers.get("HX-Target")
+    if target and (levels := below(chain, target)) is not None:
+        return levels
+    return chain
+
+
+# The request header in which clients send the versions of the layouts
+# on the page, as comma separated pairs of outlet=version.
+LAYOUT_VERSIONS = "Hmix-Layout-Versions"
+
+# The versions of the layouts being rendered, by the name of their outlet.
+outlet_versions: ContextVar[Optional[dict[str, str]]] = ContextVar(
+    "outlet_versions", default=None
+)
+
+
+def layout_version(
+    level: Level, request: HttpRequest, kwargs: dict[str, Any], /
+) -> Optional[str]:
+    """The version of the layout of a level, if it has a named outlet.
+
+    It's taken from the etag of the layout's freshness, so layouts
+    without one have no version, and are always sent again.
+    """
+    if level.outlet is None or level.freshness is None or not level.freshness.etag:
+        return None
+    level_kwargs = level.kwargs(kwargs)
+    etag = level.freshness.etag(request, **level_kwargs)
+    layout = level.layout
+    key = f"{layout.__module__}.{layout.__qualname__}\0{sorted(level_kwargs.items())}"
+    return sha256(f"{key}\0{etag}".encode()).hexdigest()[:16]
+
+
+def client_versions(request: HttpRequest, /) -> dict[str, str]:
+    """The versions of the layouts that the client has, by outlet."""
+    versions: dict[str, str] = {}
+    for pair in request.headers.get(LAYOUT_VERSIONS, "").split(","):
+        outlet, _, version = pair.strip().partition("=")
+        if outlet and version:
+            versions[outlet] = version
+    return versions
+
+
+@dataclass(frozen=True)
+class Target:
+    """The layouts of a route to render for a request.
+
+    When the client has up to date copies of more layouts than it asked
+    for, only the layouts below them are rendered, and the client is told
+    to retarget the outlet of the deepest one it has.
+    """
+
+    levels: tuple[Level, ...]
+    retarget: Optional[str] = None
+
+    @classmethod
+    def of(
+        cls, chain: tuple[Level, ...], request: HttpRequest, kwargs: dict[str, Any], /
+    ) -> Target:
+        levels = targeted(chain, request)
+        if request.headers.get("HX-Request") != "true":
+            return cls(levels)
+        # Only requests for whole pages, or for the content of an outlet,
+        # can be moved into a deeper outlet.
+        target = request.headers.get("HX-Target")
+        outlets = [level.outlet for level in chain if level.outlet]
+        boosted = request.headers.get("HX-Boosted") == "true"
+        if not (target in outlets if target else boosted):
+            return cls(levels)
+        versions = client_versions(request)
+        deepest = None
+        for level in chain:
+            # Every layout above the deepest must be current too, since
+            # none of them will be sent.
+            if level.outlet not in versions:
+                break
+            if layout_version(level, request, kwargs) != versions[level.outlet]:
+                break
+            deepest = level.outlet
+        if deepest is None or deepest == target:
+            return cls(levels)
+        below_deepest = below(chain, deepest) or ()
+        if len(below_deepest) >= len(levels):
+            return cls(levels)
+        return cls(below_deepest, deepest)
+
+    def versions(
+        self, request: HttpRequest, kwargs: dict[str, Any], /
+    ) -> dict[str, str]:
+        """The versions of the layouts being rendered, by outlet."""
+        return {
+            level.outlet: version
+            for level in self.levels
+            if level.outlet and (version := layout_version(level, request, kwargs))
+        }
+
+
+def nearest_outlet(chain: tuple[Level, ...], /) -> Optional[str]:
+    """The innermost named outlet of a compiled route, if it has one."""
+    return next((level.outlet for level in reversed(chain) if level.outlet), None)
+
+
+def below(chain: tuple[Level, ...], outlet: str, /) -> Optional[tuple[Level, ...]]:
+    """The part of a compiled route below the named outlet, if it has one."""
+    for index in range(len(chain) - 1, -1, -1):
+        if chain[index].outlet == outlet:
+            return chain[index + 1 :]
+    return None
+
+
+# The query parameter that asks for a lazy route as a page of its own,
+# such as when it's followed from a link without JavaScript.
+STANDALONE = "standalone"
+
+# The response for a route with named outlets depends on the target.
+TARGETED = Freshness(
+    etag=STATIC.etag, max_age=None, vary_on_headers=("HX-Target", LAYOUT_VERSIONS)
+)
+
+
+def layout_calls(
+    chain: tuple[Level, ...], kwargs: dict[str, Any], /
+) -> list[LayoutCall]:
+    """The layout calls for a compiled route, outermost first."""
+    return [level.call(kwargs) for level in chain]
+
+
+def compose(layouts: Iterable[LayoutResponse], /) -> LayoutResponse:
+    """Compose layouts, ordered from the outermost to the innermost."""
+    composed = LayoutResponse()
+    for layout in layouts:
+        composed = layout.compose(composed)
+    return composed
+
+
+class FilledResponse(HttpResponse):
+    """A layout filled with a partial, which keeps the segments of both.
+
+    Compressing the page segment by segment reuses the compressed copy
+    of each segment of the layout, so only the partial is compressed.
+    """
+
+    def __init__(
+        self, segments: Iterable[str], /, *, kept: Iterable[str] = (), **kwargs: Any
+    ):
+        self.segments = list(segments)
+        # The segments of the layout, which are the same between
+        # responses, unlike the partial.
+        self.kept = frozenset(kept)
+        with timed("compose"):
+            super().__init__("".join(self.segments), **kwargs)
+
+
+class StreamedResponse(StreamingHttpResponse):
+    """A layout streamed with a partial, which keeps the layout's segments.
+
+    As with ``FilledResponse``, compressing the stream reuses the
+    compressed copy of each segment of the layout.
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[str] | AsyncIterable[str],
+        /,
+        *,
+        kept: Iterable[str] = (),
+        **kwargs: Any,
+    ):
+        self.kept = frozenset(kept)
+        # Django encodes the str chunks as it sends them.
+        super().__init__(
+            cast("Iterable[bytes] | AsyncIterable[bytes]", chunks), **kwargs
+        )
+
+
+def fill(
+    request: HttpRequest,
+    partial: PartialResponse,
+    layout: Callable[[], LayoutResponse],
+    /,
+    *,
+    out_of_band: str = "",
+) -> FilledResponse | StreamedResponse:
+    """Fill the layout with the partial to make a complete response.
+
+    A partial with streaming content makes a streaming response, which
+    never holds more than a chunk of the content at once. Under ASGI,
+    the response is streamed from an async iterator, since Django reads
+    the whole of a sync one before sending any of it.
+    """
+    layout_response = partial.layout or layout()
+    content = partial.content
+    if not isinstance(content, str):
+        prefix, suffix = layout_response.split()
+        if isinstance(content, AsyncIterable) or isinstance(request, ASGIRequest):
+
+            async def achunks() -> AsyncIterator[str]:
+                for segment in prefix:
+                    yield segment
+                async for chunk in achunks_of(content):
+                    yield chunk
+                for segment in (*suffix, out_of_band):
+                    yield segment
+
+            chunks: Iterable[str] | AsyncIterable[str] = achunks()
+        else:
+            chunks = itertools.chain(prefix, content, suffix, (out_of_band,))
+        return StreamedResponse(
+            chunks,
+            kept=(*prefix, *suffix),
+            content_type=partial.content_type,
+            status=partial.status,
+            charset=partial.charset,
+            headers=partial.headers,
+        )
+    prefix, suffix = layout_response.split()
+    return FilledResponse(
+        (*prefix, content, *suffix, out_of_band),
+        kept=(*prefix, *suffix),
+        content_type=partial.content_type,
+        status=partial.status,
+        charset=partial.charset,
+        headers=partial.headers,
+    )
+
+
+def compress(request: HttpRequest, response: HttpResponseBase, /) -> None:
+    """Compress the page of a route with gzip, if the client accepts it.
+
+    Only filled and streamed pages are compressed, segment by segment,
+    since those are the pages made of layouts.
+    """
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if response.has_header("Content-Encoding") or not accepts_gzip(request):
+        return
+    kept: set[bytes] = set()
+    if isinstance(response, (FilledResponse, StreamedResponse)):
+        kept = {s.encode(response.charset) for s in response.kept}
+    if isinstance(response, FilledResponse):
+        if len(response.content) < MINIMUM:
+            return
+        charset = response.charset
+        compressed = gzip_segments(
+            (s.encode(charset) for s in response.segments), kept=kept
+        )
+        # The stubs of HttpResponse have no setter for its content.
+        setattr(response, "content", b"".join(compressed))
+    elif isinstance(response, StreamingHttpResponse):
+        content = response.streaming_content
+        if isinstance(content, AsyncIterable):
+            response.streaming_content = agzip_segments(content, kept=kept)
+        else:
+            response.streaming_content = gzip_segments(content, kept=kept)
+    else:
+        return
+    # The compressed page isn't the same bytes as the page, so its etag
+    # can only be weak, as with Django's GZipMiddleware.
+    etag = response.get("ETag")
+    if etag and etag.startswith('"'):
+        response["ETag"] = "W/" + etag
+    response["Content-Encoding"] = "gzip"
+
+
+def is_prefetch(request: HttpRequest, /) -> bool:
+    purpose = request.headers.get("Sec-Purpose") or request.headers.get("Purpose")
+    return (purpose or "").startswith("prefetch")
+
+
+def prefetch_key(request: HttpRequest, user: Any, /) -> Optional[str]:
+    """The key for a prefetched partial, private to the client.
+
+    Clients are told apart by their user, or by their CSRF cookie if
+    they aren't logged in. Clients with neither don't get a key.
+    """
+    if request.method != "GET":
+        return None
+    if user is not None and user.is_authenticated:
+        client = f"user:{user.pk}"
+    elif cookie := request.COOKIES.get(settings.CSRF_COOKIE_NAME):
+        client = f"csrf:{cookie}"
+    else:
+        return None
+    key = f"{client}\n{request.get_full_path()}"
+    return f"temploco.prefetch.{md5(key.encode(), usedforsecurity=False).hexdigest()}"
+
+
+def prefetching(
+    view: ViewFunction,
+    timeout: int,
+    /,
+    *,
+    view_cache: Optional[ViewCache] = None,
+) -> ViewFunction:
+    """Wrap a view to keep the partials it renders for prefetches.
+
+    The partial is kept briefly, and only for the client that prefetched
+    it. The next GET of the same URL by that client uses it instead of
+    running the view, and it's then discarded, so it's used at most once.
+
+    A kept partial is only used while the etag of the view's freshness,
+    and the tags of the route's view cache, are as they were when the
+    view ran. Inline requests, and requests that the view cache bypasses,
+    always run the view.
+    """
+    tags = view_cache.tags if view_cache else None
+    alias = view_cache.alias if view_cache else DEFAULT_CACHE_ALIAS
+    view_freshness = getattr(view, "freshness", None)
+    etag = view_freshness.etag if view_freshness else None
+
+    def keep(request: HttpRequest, response: ViewResult) -> bool:
+        return (
+            is_prefetch(request)
+            and isinstance(response, PartialResponse)
+            and not response.streaming
+            and response.status in (None, HTTPStatus.OK)
         )
 
+    def skip(request: HttpRequest) -> bool:
+        # Inline requests follow a write, which a kept partial predates.
+        return getattr(request, "inline", False) or bool(
+            view_cache and view_cache.bypass and view_cache.bypass(request)
+        )
+
+    def version(request: HttpRequest, kwargs: dict[str, Any]) -> tuple[Any, ...]:
+        return (
+            tag_versions(caches[alias], tags(request, **kwargs)) if tags else {},
+            etag(request, **kwargs) if etag else None,
+        )
+
+    async def aversion(request: HttpRequest, kwargs: dict[str, Any]) -> tuple[Any, ...]:
+        return (
+            await atag_versions(caches[alias], tags(request, **kwargs)) if tags else {},
+            await sync_to_async(etag)(request, **kwargs) if etag else None,
+        )
+
+    if iscoroutinefunction(view):
+
+        @wraps(view)
+        async def acached(request: HttpRequest, **kwargs: Any) -> ViewResult:
+            key = prefetch_key(request, await auser(request))
+            if key is None or skip(request):
+                return await view(request, **kwargs)
+            cache = caches[DEFAULT_CACHE_ALIAS]
+            if not is_prefetch(request):
+                if (entry := await cache.aget(key)) is not None:
+                    await cache.adelete_many([key])
+                    if entry[0] == await aversion(request, kwargs):
+                        return entry[1]
+                return await view(request, **kwargs)
+            # The version is read before the view runs, so a partial
+            # rendered while its data was changing is never used.
+            current = await aversion(request, kwargs)
+            response = await view(request, **kwargs)
+            if keep(request, response):
+                await cache.aset(key, (current, response), timeout)
+            return response
+
+        return acached
+
+    render = cast("Callable[..., ViewResult]", view)
+
+    @wraps(view)
+    def cached(request: HttpRequest, **kwargs: Any) -> ViewResult:
+        key = prefetch_key(request, getattr(request, "user", None))
+        if key is None or skip(request):
+            return render(request, **kwargs)
+        cache = caches[DEFAULT_CACHE_ALIAS]
+        if not is_prefetch(request):
+            if (entry := cache.get(key)) is not None:
+                cache.delete(key)
+                if entry[0] == version(request, kwargs):
+                    return entry[1]
+            return render(request, **kwargs)
+        current = version(request, kwargs)
+        response = render(request, **kwargs)
+        if keep(request, response):
+            cache.set(key, (current, response), timeout)
+        return response
+
+    return cached
+
+
+def prefetchable(urls: Iterable[str], /) -> list[str]:
+    """The URLs that are handled by routes that keep their prefetches."""
+    found: list[str] = []
+    for url in urls:
+        try:
+            match = resolve(urlsplit(url).path)
+        except Resolver404:
+            continue
+        if getattr(match.func, "prefetchable", False):
+            found.append(url)
+    return found
+
+
+def prefetch_elements(urls: Iterable[str], /) -> str:
+    return format_html_join("", '<link rel="prefetch" href="{}">', ((u,) for u in urls))
+
+
+def swap_oob(
+    chain: tuple[Level, ...],
+    request: HttpRequest,
+    kwargs: dict[str, Any],
+    oob: dict[str, PartialResponse],
+    /,
+) -> str:
+    """Serialize partials to be swapped into other elements by htmx.
+
+    Partials for the outlets of the route are filled into the layouts
+    below that outlet, just as if that outlet had been targeted.
+    """
+    fragments: list[str] = []
+    for target, partial in oob.items():
+        if not isinstance(partial.content, str):
+            raise Exception("Out of band partials can't be streamed.")
+        levels = below(chain, target) or ()
+        calls = layout_calls(levels, kwargs)
+        layout = partial.layout or compose(
+            synchronously(layout)(request, **kw) for layout, kw in calls
+        )
+        fragments.append(
+            format_html(
+                '<div hx-swap-oob="innerHTML:#{}">{}</div>',
+                target,
+                mark_safe(layout.fill(partial.content)),
+            )
+        )
+    return "".join(fragments)
+
+
+def synchronously(func: Callable[..., Any], /) -> Callable[..., Any]:
+    """Adapt a layout or view so that it can be called from sync code."""
+    return async_to_sync(func) if iscoroutinefunction(func) else func
+
+
+def concurrently(func: Callable[..., Any], /) -> Callable[..., Awaitable[Any]]:
+    """Adapt a layout or view so that it can be awaited alongside others.
+
+    Sync functions run in a thread of their own rather than the shared
+    thread that ``sync_to_async`` uses by default, otherwise they would
+    still run one after another. Each of those threads gets its own
+    database connection, so it's released when the function finishes.
+    """
+    if iscoroutinefunction(func):
+        return func
+
+    def call(*args: Any, **kwargs: Any) -> Any:
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(call, thread_sensitive=False)
+
 
 class Route:
     def __init__(
         self,
         *,
         path: str = "",
-        layout: Optional[Callable[..., LayoutResponse]] = None,
+        layout: Optional[LayoutFunction] = None,
         children: Optional[list[Route]] = None,
-        view: Optional[Callable[..., HttpResponse | PartialResponse]] = None,
+        view: Optional[ViewFunction] = None,
         name: Optional[str] = None,
+        stream: Optional[bool] = None,
+        concurrent: Optional[bool] = None,
+        compressed: Optional[bool] = None,
+        layout_cache: Optional[LayoutCache] = None,
+        view_cache: Optional[ViewCache] = None,
+        outlet: Optional[str] = None,
+        lazy: bool = False,
+        prefetch_timeout: Optional[int] = None,
+        prerender: Optional[Callable[[], Iterable[dict[str, Any]]]] = None,
+        deadline: Optional[float] = None,
+        fallback: Optional[str | Callable[..., PartialResponse]] = None,
     ):
         self.__path = path
-        self.__layout = layout or (lambda *a, **kw: LayoutResponse())
+        self.__layout: LayoutFunction = layout or (lambda *a, **kw: LayoutResponse())
+        self.__freshness = getattr(layout, "freshness", None) if layout else STATIC
+        if layout and layout_cache:
+            self.__layout = layout_cache.wrap(layout)
+        self.__layout_name = layout.__qualname__ if layout else None
+        if layout:
+            self.__layout = timer("layout", layout.__qualname__)(self.__layout)
         self.__children = children or []
         self.__view = view
+        self.__view_cache = view_cache
         self.__name = name
+        self.__stream = stream
+        self.__concurrent = concurrent
+        self.__compressed = compressed
+        self.__outlet = outlet
+        self.__lazy = lazy
+        self.__prefetch_timeout = prefetch_timeout
+        self.__prerender = prerender
+        if deadline is not None and fallback is None:
+            raise Exception("A deadline needs a fallback to render when it's missed.")
+        self.__boundary = Boundary(fallback, deadline) if fallback else None
 
-    def __resolver(
+    def __create_view(
         self,
+        chain: tuple[Level, ...],
         /,
         *,
-        full_path: str,
-        resolve_layout: Callable[..., LayoutResponse],
-    ) -> Callable[..., LayoutResponse]:
-        urlpattern = re_path(r".*", lambda *a, **kw: HttpResponse())
-        urlresolver = re_path(r"^/", include([path(full_path, include([urlpattern]))]))
-
-        def resolve(request: HttpRequest, **kwargs: Any) -> LayoutResponse:
-            layout = resolve_layout(request, **kwargs)
-            resolver_match = urlresolver.resolve(request.path)
-            resolved = self.__layout(request, **resolver_match.kwargs)
-            return resolved.compose(layout)
-
-        return resolve
-
-    def __create_view(
-        self, layout: Callable[..., LayoutResponse], /
-    ) -> Callable[..., HttpResponse]:
+        stream: bool = False,
+        concurrent: bool = False,
+        compressed: bool = False,
+        boundary: Optional[Boundary] = None,
+        lazy_parent: Optional[str] = None,
+    ) -> Callable[..., HttpResponseBase | Coroutine[Any, Any, HttpResponseBase]]:
         view = self.__view
         if not view:
             raise Exception("No view given for this path.")
+        name = view.__qualname__
+        identity = f"{view.__module__}.{name}"
+        if self.__view_cache:
+            view = self.__view_cache.wrap(view)
+        if self.__prefetch_timeout is not None:
+            view = prefetching(
+                view, self.__prefetch_timeout, view_cache=self.__view_cache
+            )
+        if boundary:
+            view = boundary.bound(
+                view,
+                part=f"view {name}",
+                outlet=nearest_outlet(chain),
+            )
+        view = timer("view", name)(view)
+        outlets = tuple(level.outlet for level in chain if level.outlet)
+
+        def aim(request: HttpRequest, kwargs: dict[str, Any]) -> Target:
+            if lazy_parent and request.headers.get("HX-Request") == "true":
+                # Lazy routes fill a placeholder in the page of their
+                # parent, so they don't need any of its layouts.
+                return Target(())
+            return Target.of(chain, request, kwargs)
+
+        def lazy_redirect(
+            request: HttpRequest, kwargs: dict[str, Any]
+        ) -> Optional[HttpResponse]:
+            # A lazy route loaded as the first request of a page is sent
+            # to its parent page, which will load it, without running it.
+            if (
+                lazy_parent is None
+                or request.method not in ("GET", "HEAD")
+                or request.headers.get("HX-Request") == "true"
+                or STANDALONE in request.GET
+            ):
+                return None
+            assert request.resolver_match is not None
+            name = ":".join([*request.resolver_match.namespaces, lazy_parent])
+            return HttpResponseRedirect(reverse(name, kwargs=chain[-2].kwargs(kwargs)))
+
+        def plain(partial: PartialResponse) -> bool:
+            # A streamed page takes the status and headers of the stream, so
+            # only a plain partial is streamed. Anything else, such as a
+            # redirect, gets the response it would get if it weren't.
+            return (
+                partial.layout is None
+                and partial.status in (None, HTTPStatus.OK)
+                and not partial.headers
+                and not partial.content_type
+                and not partial.charset
+            )
+
+        def announce(
+            request: HttpRequest,
+            partial: PartialResponse,
+            response: HttpResponseBase,
+        ) -> None:
+            # 1xx responses like Early Hints can't be sent through Django,
+            # so the links go in a header. Clients only act on the header
+            # for pages they navigate to, so htmx gets elements instead,
+            # out of band.
+            urls = prefetchable(partial.prefetch or [])
+            if urls and request.headers.get("HX-Request") != "true":
+                response["Link"] = ", ".join(f"<{url}>; rel=prefetch" for url in urls)
+
+        def streams(request: HttpRequest, partial: PartialResponse) -> bool:
+            # Only GETs are streamed, since HEADs have no page to stream.
+            # htmx doesn't swap anything in until the whole response has
+            # arrived, so its requests gain nothing from streaming, and
+            # are left free to choose their own layout.
+            return (
+                stream
+                and request.method == "GET"
+                and request.headers.get("HX-Request") != "true"
+                and plain(partial)
+            )
+
+        def setup_stream(request: HttpRequest) -> None:
+            # The headers are sent with the first chunk, before any chunked
+            # content that might use the CSRF token is rendered, so make
+            # sure that the cookie for the token is set up front.
+            get_token(request)
+
+        def streamview(
+            request: HttpRequest, partial: PartialResponse, layout: LayoutResponse
+        ) -> StreamingHttpResponse:
+            # The view and the layouts have run before anything is sent, so
+            # that the status and headers of the page are known, and take
+            # any fallbacks into account. Content that's still being
+            # produced follows the head.
+            setup_stream(request)
+            prefix, suffix = layout.split()
+
+            def content() -> Iterator[str]:
+                yield from prefix
+                yield from chunks_of(partial.content)
+                yield prefetch_elements(prefetchable(partial.prefetch or []))
+                yield from suffix
+
+            response = StreamedResponse(
+                streamable(request, content()), kept=(*prefix, *suffix)
+            )
+            announce(request, partial, response)
+            return response
 
-        def routeview(request: HttpRequest, **kwargs: Any) -> HttpResponse:
-            response = view(request, **kwargs)
+        def negotiate(
+            request: HttpRequest, target: Target, kwargs: dict[str, Any]
+        ) -> Optional[CacheHeaders]:
+            # Conditional requests are answered before any layouts or
+            # views are run, so only the freshness of each is checked.
+            if request.method not in ("GET", "HEAD"):
+                return None
+            parts = [(level.freshness, level.kwargs(kwargs)) for level in target.levels]
+            parts.append((getattr(view, "freshness", None), kwargs))
+            if outlets:
+                parts.append((TARGETED, {}))
+            return CacheHeaders.negotiate(request, parts, identity=identity)
+
+        def out_of_band(
+            request: HttpRequest, kwargs: dict[str, Any], partial: PartialResponse
+        ) -> str:
+            # Only htmx can swap out of band. Other requests get the whole
+            # page, which already has the latest content in every region.
+            if request.headers.get("HX-Request") != "true":
+                return ""
+            swaps = swap_oob(chain, request, kwargs, partial.oob or {})
+            return swaps + prefetch_elements(prefetchable(partial.prefetch or []))
+
+        def retarget(target: Target, response: HttpResponseBase) -> None:
+            # The content fills a deeper outlet than the one the client
+            # asked for, since it already has the layouts above it.
+            if target.retarget and not response.has_header("HX-Retarget"):
+                response["HX-Retarget"] = f"#{target.retarget}"
+
+        def plan(
+            request: HttpRequest, kwargs: dict[str, Any]
+        ) -> tuple[Target, Optional[CacheHeaders], dict[str, str]]:
+            target = aim(request, kwargs)
+            cache_headers = negotiate(request, target, kwargs)
+            return target, cache_headers, target.versions(request, kwargs)
+
+        def respond(
+            request: HttpRequest, target: Target, kwargs: dict[str, Any]
+        ) -> HttpResponseBase:
+            # Routes with any async layouts or views are served by arespond.
+            response = cast("ViewResult", view(request, **kwargs))
             if isinstance(response, PartialResponse):
-                layout_response = response.layout or layout(request, **kwargs)
-                response = HttpResponse(
-                    content=layout_response.fill(response.content),
-                    content_type=response.content_type,
-                    status=response.status,
-                    charset=response.charset,
-                    headers=response.headers,
+                partial = response
+                calls = layout_calls(target.levels, kwargs)
+
+                def layouts() -> LayoutResponse:
+                    return compose(
+                        cast(LayoutResponse, layout(request, **kw))
+                        for layout, kw in calls
+                    )
+
+                if streams(request, partial):
+                    return streamview(request, partial, layouts())
+                response = fill(
+                    request,
+                    partial,
+                    layouts,
+                    out_of_band=out_of_band(request, kwargs, partial),
                 )
+                announce(request, partial, response)
             return response
 
-        return routeview
+        def asyncstreamview(
+            request: HttpRequest, partial: PartialResponse, layout: LayoutResponse
+        ) -> StreamingHttpResponse:
+            setup_stream(request)
+            prefix, suffix = layout.split()
+
+            async def content() -> AsyncIterator[str]:
+                for segment in prefix:
+                    yield segment
+                async for chunk in achunks_of(partial.content):
+                    yield chunk
+                yield prefetch_elements(prefetchable(partial.prefetch or []))
+                for segment in suffix:
+                    yield segment
+
+            response = StreamedResponse(content(), kept=(*prefix, *suffix))
+            announce(request, partial, response)
+            return response
+
+        async def arespond(
+            request: HttpRequest, target: Target, kwargs: dict[str, Any]
+        ) -> HttpResponseBase:
+            calls = layout_calls(target.levels, kwargs)
+            layouts: Optional[list[LayoutResponse]] = None
+            if request.method in ("GET", "HEAD"):
+                # The layouts don't depend on the view, so they're all run
+                # together. If the view doesn't return a partial, then the
+                # layouts are wasted, but the common case is faster.
+                *layouts, response = await asyncio.gather(
+                    *(concurrently(layout)(request, **kw) for layout, kw in calls),
+                    concurrently(view)(request, **kwargs),
+                )
+            else:
+                # Other methods tend to redirect, so the layouts only run
+                # once the view has returned a partial that needs them.
+                response = await concurrently(view)(request, **kwargs)
+            if isinstance(response, PartialResponse):
+                partial = response
+                if layouts is None and partial.layout is None:
+                    layouts = await asyncio.gather(
+                        *(concurrently(layout)(request, **kw) for layout, kw in calls)
+                    )
+                if streams(request, partial):
+                    return asyncstreamview(request, partial, compose(layouts or ()))
+                oob = await sync_to_async(out_of_band)(request, kwargs, partial)
+                response = fill(
+                    request, partial, lambda: compose(layouts or ()), out_of_band=oob
+                )
+                announce(request, partial, response)
+            return response
+
+        def routeview(request: HttpRequest, **kwargs: Any) -> HttpResponseBase:
+            if response := lazy_redirect(request, kwargs):
+                return response
+            target, cache_headers, versions = plan(request, kwargs)
+            if cache_headers and (response := cache_headers.not_modified(request)):
+                return response
+            parts: list[str] = []
+            token = fallen.set(parts)
+            versions_token = outlet_versions.set(versions)
+            try:
+                response = respond(request, target, kwargs)
+            finally:
+                outlet_versions.reset(versions_token)
+                fallen.reset(token)
+            retarget(target, response)
+            if outlets:
+                # Whatever the freshness of the page, its content depends
+                # on the outlet that's targeted.
+                vary_on(response, TARGETED.vary_on_headers)
+            if parts:
+                # A page with fallbacks in it mustn't be cached as whole.
+                add_never_cache_headers(response)
+            elif cache_headers:
+                cache_headers.apply(response)
+            if compressed:
+                compress(request, response)
+            return response
+
+        async def asyncrouteview(
+            request: HttpRequest, **kwargs: Any
+        ) -> HttpResponseBase:
+            if response := lazy_redirect(request, kwargs):
+                return response
+            target, cache_headers, versions = await sync_to_async(plan)(request, kwargs)
+            if cache_headers and (response := cache_headers.not_modified(request)):
+                return response
+            parts: list[str] = []
+            token = fallen.set(parts)
+            versions_token = outlet_versions.set(versions)
+            try:
+                response = await arespond(request, target, kwargs)
+            finally:
+                outlet_versions.reset(versions_token)
+                fallen.reset(token)
+            retarget(target, response)
+            if outlets:
+                vary_on(response, TARGETED.vary_on_headers)
+            if parts:
+                add_never_cache_headers(response)
+            elif cache_headers:
+                cache_headers.apply(response)
+            if compressed:
+                compress(request, response)
+            return response
+
+        # Async views and layouts can only be awaited by the async view,
+        # and waiting on them in a thread would defeat the point of them.
+        asynchronous = iscoroutinefunction(view) or any(
+            iscoroutinefunction(level.layout) for level in chain
+        )
+        routed = asyncrouteview if concurrent or asynchronous else routeview
+        # Mark the view, so that it's known to be safe to render inline,
+        # and whether it's worth prefetching.
+        setattr(routed, "route", self)
+        setattr(routed, "prefetchable", self.__prefetch_timeout is not None)
+        # Expose what the route runs, so it can be warmed up in advance.
+        setattr(routed, "view", self.__view)
+        setattr(routed, "layouts", tuple(level.layout for level in chain))
+        setattr(routed, "outlets", outlets)
+        # The URL kwargs of every page of the route to render in advance.
+        setattr(routed, "prerender", self.__prerender)
+        return routed
 
     def path(
         self,
         /,
         *,
-        parent_path: str = "",
-        resolve_parent: Optional[Callable[..., LayoutResponse]] = None,
+        parent_chain: tuple[Level, ...] = (),
+        parent_stream: bool = False,
+        parent_concurrent: bool = False,
+        parent_compressed: bool = False,
+        parent_boundary: Optional[Boundary] = None,
+        parent_name: Optional[str] = None,
     ) -> URLPattern | URLResolver:
-        """Construct the path to include in the URLConf."""
-        full_path = parent_path + self.__path
-        resolve_parent = resolve_parent or (lambda *a, **kw: LayoutResponse())
-        resolve = self.__resolver(full_path=full_path, resolve_layout=resolve_parent)
-        if self.__children:
-            child_paths = [
-                child.path(parent_path=full_path, resolve_parent=resolve)
-                for child in self.__children
-            ]
-            return path(self.__path, include(child_paths))
-        if not self.__name:
-            # Routes with children don't need to be reversed, but routes
-            # without children might need to be. Since we construct an
-            # internal view, there's no view function to reverse with.
-            raise Exception("name required for routes without children.")
-        return path(self.__path, self.__create_view(resolve), name=self.__name)
+        """Construct the path to include in the URLConf.
+
+        The whole tree is compiled up front: each leaf gets the chain of
+        layouts above it, so Django's URL resolution runs only once per
+        request. Children inherit the stream, concurrent and compressed
+        settings of their parent unless they set their own.
+
+        Views and layouts may be async functions. Routes with any of them
+        are served asynchronously, whatever their concurrent setting.
+
+        Streamed routes send the page to GETs as it's produced, head first,
+        once their view and layouts have run. Only a plain PartialResponse
+        is streamed, without a status, headers, content type or layout of
+        its own. Anything else, such as a redirect, is sent as it would be
+        if the route weren't streamed.
+
+        A route with a fallback is an error boundary for its layout and
+        view, and those of its children unless they have their own.
+
+        A route may have both a view and children, such as a page with
+        lazy children that are loaded into it after it's rendered.
+        """
+        params = frozenset(RoutePattern(self.__path).converters)
+        if parent_chain:
+            params |= parent_chain[-1].params
+        boundary = self.__boundary or parent_boundary
+        layout = self.__layout
+        if boundary and self.__layout_name:
+            layout = boundary.bound(
+                layout,
+                part=f"layout {self.__layout_name}",
+                outlet=nearest_outlet(parent_chain),
+                layout=True,
+            )
+        level = Level(layout, params, self.__freshness, self.__outlet)
+        chain = (*parent_chain, level)
+        stream = parent_stream if self.__stream is None else self.__stream
+        concurrent = (
+            parent_concurrent if self.__concurrent is None else self.__concurrent
+        )
+        compressed = (
+            parent_compressed if self.__compressed is None else self.__compressed
+        )
+        if self.__lazy and not parent_name:
+            raise Exception("lazy routes must be the child of a route with a view.")
+        if not self.__view and not self.__children:
+            raise Exception("No view given for this path.")
+
+        def view_path(route: str) -> URLPattern:
+            if not self.__name:
+                # Routes with children don't need to be reversed, but routes
+                # with views might need to be. Since we construct an
+                # internal view, there's no view function to reverse with.
+                raise Exception("name required for routes with views.")
+            routeview = self.__create_view(
+                chain,
+                stream=stream,
+                concurrent=concurrent,
+                compressed=compressed,
+                boundary=boundary,
+                lazy_parent=parent_name if self.__lazy else None,
+            )
+            return path(route, routeview, name=self.__name)
+
+        if not self.__children:
+            return view_path(self.__path)
+        child_paths: list[URLPattern | URLResolver] = [
+            child.path(
+                parent_chain=chain,
+                parent_stream=stream,
+                parent_concurrent=concurrent,
+                parent_compressed=compressed,
+                parent_boundary=boundary,
+                parent_name=self.__name if self.__view else None,
+            )
+            for child in self.__children
+        ]
+        if self.__view:
+            child_paths.insert(0, view_path(""))
+        return path(self.__path, include(child_paths))
 
 
 ############
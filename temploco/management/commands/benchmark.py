@@ -0,0 +1,72 @@
+from typing import Any, Optional
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from temploco import benchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmark composing routes and layouts, and compare with a baseline."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--depth", type=int, nargs="+", default=[1, 3, 6])
+        parser.add_argument("--fanout", type=int, nargs="+", default=[2])
+        parser.add_argument(
+            "--layout-size", type=int, nargs="+", default=[1000, 100_000]
+        )
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[10, 10_000],
+            help="Sizes of the contacts table, up to 1000000 or more.",
+        )
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument("--save", help="Save the results as a JSON baseline.")
+        parser.add_argument("--compare", help="Fail if worse than a JSON baseline.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.1,
+            help="How much worse than the baseline timings may be, as a fraction.",
+        )
+
+    def handle(
+        self,
+        *args: Any,
+        depth: list[int],
+        fanout: list[int],
+        layout_size: list[int],
+        rows: list[int],
+        requests: int,
+        warmup: int,
+        save: Optional[str],
+        compare: Optional[str],
+        tolerance: float,
+        **options: Any,
+    ) -> None:
+        results: list[benchmark.Result] = []
+        self.stdout.write(
+            f"{'benchmark':<56} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+            f"{'KiB':>9} {'queries':>7}"
+        )
+        for result in benchmark.run(
+            depths=depth,
+            fanouts=fanout,
+            layout_sizes=layout_size,
+            rows=rows,
+            requests=requests,
+            warmup=warmup,
+        ):
+            results.append(result)
+            self.stdout.write(
+                f"{result.name:<56} {result.requests_per_second:>9.1f} "
+                f"{result.p50_ms:>8.2f} {result.p99_ms:>8.2f} "
+                f"{result.allocated_kib:>9.1f} {result.queries:>7g}"
+            )
+        if save:
+            benchmark.save(results, save)
+        if compare:
+            regressions = benchmark.compare(results, compare, tolerance=tolerance)
+            if regressions:
+                raise CommandError("Regressions:\n" + "\n".join(regressions))
+            self.stdout.write("No regressions.")
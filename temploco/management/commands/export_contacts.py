@@ -0,0 +1,21 @@
+from typing import Any, Optional
+from django.core.management.base import BaseCommand, CommandParser
+from temploco import bulk
+
+
+class Command(BaseCommand):
+    help = "Export every contact as CSV or NDJSON, to a file or to stdout."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("path", nargs="?", help="Defaults to stdout.")
+        parser.add_argument("--format", choices=bulk.FORMATS, default="csv")
+
+    def handle(
+        self, *args: Any, path: Optional[str], format: str, **options: Any
+    ) -> None:
+        if path is None or path == "-":
+            for line in bulk.export_contacts(format):
+                self.stdout.write(line, ending="")
+            return
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            file.writelines(bulk.export_contacts(format))
@@ -0,0 +1,37 @@
+import sys
+from typing import Any, Optional
+from django.core.management.base import BaseCommand, CommandParser
+from temploco import bulk
+
+
+class Command(BaseCommand):
+    help = "Import contacts from a CSV or NDJSON file, or from stdin."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("path", nargs="?", help="Defaults to stdin.")
+        parser.add_argument("--format", choices=bulk.FORMATS)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(
+        self,
+        *args: Any,
+        path: Optional[str],
+        format: Optional[str],
+        batch_size: int,
+        **options: Any,
+    ) -> None:
+        format = format or bulk.format_of(path)
+        if path is None or path == "-":
+            report = bulk.import_contacts(
+                bulk.parse(sys.stdin, format), batch_size=batch_size
+            )
+        else:
+            with open(path, encoding="utf-8-sig", newline="") as file:
+                report = bulk.import_contacts(
+                    bulk.parse(file, format), batch_size=batch_size
+                )
+        for error in report.errors:
+            self.stderr.write(f"Line {error.line}: {error.errors}")
+        self.stdout.write(
+            f"Imported {report.created} contacts, skipped {len(report.errors)} rows."
+        )
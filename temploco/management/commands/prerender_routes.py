@@ -0,0 +1,21 @@
+from pathlib import Path
+from typing import Any, Optional
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from temploco import prerender
+
+
+class Command(BaseCommand):
+    help = "Render the pages of routes in advance, to be served as files."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--output", help="Defaults to the TEMPLOCO_PRERENDERED_DIR setting."
+        )
+
+    def handle(self, *args: Any, output: Optional[str], **options: Any) -> None:
+        output = output or getattr(settings, "TEMPLOCO_PRERENDERED_DIR", None)
+        if output is None:
+            raise CommandError("No --output given, and no TEMPLOCO_PRERENDERED_DIR.")
+        count = prerender.export(Path(output))
+        self.stdout.write(f"Rendered {count} pages into {output}.")
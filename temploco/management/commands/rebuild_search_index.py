@@ -0,0 +1,16 @@
+from typing import Any
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from temploco import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the contact search index from scratch."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args: Any, batch_size: int, **options: Any) -> None:
+        with transaction.atomic():
+            count = search.rebuild(batch_size=batch_size)
+        self.stdout.write(f"Indexed {count} contacts.")
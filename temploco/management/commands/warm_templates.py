@@ -0,0 +1,20 @@
+from typing import Any
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from temploco import warmup
+
+
+class Command(BaseCommand):
+    help = "Load the templates of every route, reporting how long each takes."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--slowest", type=int, default=10)
+
+    def handle(self, *args: Any, slowest: int, **options: Any) -> None:
+        try:
+            timings = warmup.warm_up()
+        except Exception as error:
+            raise CommandError(str(error)) from error
+        for name, seconds in sorted(timings, key=lambda t: -t[1])[:slowest]:
+            self.stdout.write(f"{seconds * 1000:8.2f}ms  {name}")
+        total = sum(seconds for _, seconds in timings)
+        self.stdout.write(f"Loaded {len(timings)} templates in {total * 1000:.2f}ms.")
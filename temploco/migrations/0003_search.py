@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:37
+
+import re
+
+import django.db.models.deletion
+from django.apps.registry import Apps
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.utils import OperationalError
+
+FTS_TABLE = "temploco_contact_fts"
+
+
+def create_index(apps: Apps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                "first, last, email, phone, tokenize='unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            pass  # SQLite without FTS5 falls back to the term table.
+        else:
+            schema_editor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, first, last, email, phone) "
+                "SELECT id, first, last, email, phone FROM temploco_contact"
+            )
+            return
+    Contact = apps.get_model("temploco", "Contact")
+    ContactTerm = apps.get_model("temploco", "ContactTerm")
+    db = connection.alias
+    ContactTerm._default_manager.using(db).bulk_create(
+        (
+            ContactTerm(contact_id=pk, term=term)
+            for pk, *fields in Contact._default_manager.using(db)
+            .values_list("id", "first", "last", "email", "phone")
+            .iterator()
+            for term in {
+                term for field in fields for term in re.findall(r"\w+", field.lower())
+            }
+        ),
+        batch_size=1000,
+    )
+
+
+def drop_index(apps: Apps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("temploco", "0002_contact_updated"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContactTerm",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(db_index=True, max_length=256)),
+                (
+                    "contact",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="temploco.contact",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from dataclasses import dataclass
+from functools import reduce
+from typing import Any, Generic, Optional, TypeVar, cast
+from django.core.exceptions import BadRequest, ValidationError
+from django.db.models import Field, Model, Q, QuerySet
+from django.http import HttpRequest
+
+M = TypeVar("M", bound=Model)
+
+
+@dataclass
+class Page(Generic[M]):
+    """A page of results, with the URLs of the pages on either side."""
+
+    items: list[M]
+    next_url: Optional[str] = None
+    previous_url: Optional[str] = None
+
+
+def encode_cursor(values: list[Any]) -> str:
+    return urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def ordering_fields(
+    queryset: QuerySet[Any], ordering: tuple[str, ...]
+) -> list[Field[Any, Any]]:
+    """The fields that a queryset is ordered by, annotations included."""
+    meta = queryset.model._meta
+    fields: list[Field[Any, Any]] = []
+    for name in ordering:
+        name = name.lstrip("-")
+        if name in queryset.query.annotations:
+            field = queryset.query.annotations[name].output_field
+        else:
+            field = meta.pk if name == "pk" else meta.get_field(name)
+        if not isinstance(field, Field):
+            raise Exception(f"Can't paginate by {name}, which isn't a field.")
+        fields.append(cast("Field[Any, Any]", field))
+    return fields
+
+
+def decode_cursor(cursor: str, fields: list[Field[Any, Any]]) -> list[Any]:
+    """The values of the ordering fields in a cursor, converted for them.
+
+    Cursors come from the client, so values that don't fit their fields
+    are a bad request rather than an error in the query.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        decoded: Any = json.loads(urlsafe_b64decode(padded))
+    except (BinasciiError, UnicodeDecodeError, ValueError):
+        raise BadRequest("Invalid cursor.")
+    values = cast(list[Any], decoded) if isinstance(decoded, list) else []
+    if len(values) != len(fields):
+        raise BadRequest("Invalid cursor.")
+    try:
+        values = [field.to_python(value) for field, value in zip(fields, values)]
+    except (ValidationError, TypeError, ValueError):
+        raise BadRequest("Invalid cursor.")
+    if None in values:
+        raise BadRequest("Invalid cursor.")
+    return values
+
+
+def keyset(ordering: tuple[str, ...], values: list[Any], *, forward: bool) -> Q:
+    """Filter for the rows after (or before) the given values in order."""
+    conditions: list[Q] = []
+    for index, field in enumerate(ordering):
+        descending = field.startswith("-")
+        lookup = "gt" if descending != forward else "lt"
+        condition = Q(**{f"{field.lstrip('-')}__{lookup}": values[index]})
+        for prior, value in zip(ordering[:index], values):
+            condition &= Q(**{prior.lstrip("-"): value})
+        conditions.append(condition)
+    return reduce(Q.__or__, conditions)
+
+
+def page_url(request: HttpRequest, key: str, cursor: str) -> str:
+    query = request.GET.copy()
+    query.pop("after", None)
+    query.pop("before", None)
+    query[key] = cursor
+    return f"{request.path}?{query.urlencode()}"
+
+
+def ordered(
+    request: HttpRequest, queryset: QuerySet[M], ordering: tuple[str, ...]
+) -> tuple[QuerySet[M], bool, Optional[str]]:
+    """The queryset for the page, whether it's forward, and its cursor."""
+    after = request.GET.get("after")
+    before = request.GET.get("before")
+    forward = before is None
+    cursor = after if forward else before
+    if forward:
+        order = ordering
+    else:
+        order = tuple(f[1:] if f.startswith("-") else f"-{f}" for f in ordering)
+    queryset = queryset.order_by(*order)
+    if cursor is not None:
+        fields = ordering_fields(queryset, ordering)
+        position = decode_cursor(cursor, fields)
+        queryset = queryset.filter(keyset(ordering, position, forward=forward))
+    return queryset, forward, cursor
+
+
+def page_of(
+    request: HttpRequest,
+    items: list[M],
+    ordering: tuple[str, ...],
+    size: int,
+    forward: bool,
+    cursor: Optional[str],
+) -> Page[M]:
+    # One extra row shows whether there's another page in this direction.
+    more = len(items) > size
+    items = items[:size]
+    if not forward:
+        items.reverse()
+
+    def cursor_of(item: M) -> str:
+        return encode_cursor([getattr(item, f.lstrip("-")) for f in ordering])
+
+    page = Page(items)
+    if items and (more if forward else cursor is not None):
+        page.next_url = page_url(request, "after", cursor_of(items[-1]))
+    if items and (cursor is not None if forward else more):
+        page.previous_url = page_url(request, "before", cursor_of(items[0]))
+    return page
+
+
+def paginate(
+    request: HttpRequest,
+    queryset: QuerySet[M],
+    *,
+    ordering: tuple[str, ...] = ("pk",),
+    size: int = 50,
+) -> Page[M]:
+    """Paginate a queryset by keyset, using the after and before cursors.
+
+    Rather than counting rows with an offset, each page continues from
+    the values of the ordering fields in the last row of the page it
+    follows, so every page costs the same to load on an indexed column.
+    The last ordering field must be unique, so that the order is total.
+    """
+    queryset, forward, cursor = ordered(request, queryset, ordering)
+    items = list(queryset[: size + 1])
+    return page_of(request, items, ordering, size, forward, cursor)
+
+
+async def apaginate(
+    request: HttpRequest,
+    queryset: QuerySet[M],
+    *,
+    ordering: tuple[str, ...] = ("pk",),
+    size: int = 50,
+) -> Page[M]:
+    """Paginate a queryset like ``paginate``, for async views."""
+    queryset, forward, cursor = ordered(request, queryset, ordering)
+    items = [item async for item in queryset[: size + 1]]
+    return page_of(request, items, ordering, size, forward, cursor)
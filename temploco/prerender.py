@@ -0,0 +1,232 @@
+"""Rendering pages of routes in advance, and serving them as files.
+
+Routes with a ``prerender`` function, which lists the URL kwargs of
+their pages, are rendered by ``export`` into a directory: the whole
+page, and the content of each of its outlets for htmx. The CSRF token
+is left as a slot, which ``PrerenderedMiddleware`` fills for each
+request when it serves the files from ``TEMPLOCO_PRERENDERED_DIR``.
+
+Files are served uncompressed, with an ETag of their content, and with
+cache headers of their own: a page with a token filled in is private to
+the user it's for, and any other page is public. Either way it's
+revalidated on every use, so that changes to it are seen.
+
+Pages are only served to anonymous users, for GETs without a query
+string. A view with an etag in its freshness is checked against the
+version it had when it was rendered, so pages that have changed since
+are rendered by the route as usual.
+"""
+
+from __future__ import annotations
+
+import json
+from contextvars import ContextVar
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, cast
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpRequest, HttpResponse
+from django.http.response import HttpResponseBase
+from django.urls import (
+    Resolver404,
+    URLPattern,
+    URLResolver,
+    get_resolver,
+    resolve,
+    reverse,
+)
+from django.utils.cache import (
+    cc_delim_re,
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from .layout import LayoutResponse
+
+MANIFEST = "manifest.json"
+# Only these headers of a rendered page are the same for everyone.
+HEADERS = ("Content-Type", "Vary", "Link")
+FULL = ""
+
+exporting: ContextVar[bool] = ContextVar("exporting", default=False)
+
+
+def prerendered_routes(
+    resolver: Optional[URLResolver] = None,
+    namespaces: tuple[str, ...] = (),
+    /,
+) -> Iterator[tuple[str, Callable[..., Any]]]:
+    """The names and views of routes with pages to render in advance."""
+    resolver = resolver or get_resolver()
+    # The stubs have the wrong type for the patterns of a resolver.
+    patterns = cast("list[URLPattern | URLResolver]", resolver.url_patterns)
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            inner = (
+                (*namespaces, pattern.namespace) if pattern.namespace else namespaces
+            )
+            yield from prerendered_routes(pattern, inner)
+        elif getattr(pattern.callback, "prerender", None) and pattern.name:
+            yield ":".join([*namespaces, pattern.name]), pattern.callback
+
+
+def version(
+    routed: Callable[..., Any], request: HttpRequest, kwargs: dict[str, Any], /
+) -> Optional[str]:
+    """The version of the view of a route, if its freshness has an etag."""
+    freshness = getattr(routed.view, "freshness", None)  # type: ignore
+    if freshness is None or freshness.etag is None:
+        return None
+    return freshness.etag(request, **kwargs)
+
+
+def host() -> str:
+    return next(
+        (h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost"
+    )
+
+
+def export(directory: Path, /) -> int:
+    """Render the pages of every prerendered route, returning how many.
+
+    Pages that don't render with a 200 are left out.
+    """
+    from django.test import Client, RequestFactory
+
+    pages_dir = directory / "pages"
+    pages_dir.mkdir(parents=True, exist_ok=True)
+    client = Client(HTTP_HOST=host())
+    factory = RequestFactory(HTTP_HOST=host())
+    manifest: dict[str, Any] = {}
+
+    def render(url: str, outlet: str) -> Optional[dict[str, Any]]:
+        headers = {"HX-Request": "true", "HX-Target": outlet} if outlet else {}
+        response = client.get(url, headers=headers)
+        if response.status_code != 200:
+            return None
+        content = b"".join(response) if response.streaming else response.content
+        name = sha256(f"{url}\n{outlet}".encode()).hexdigest()
+        (pages_dir / f"{name}.html").write_bytes(content)
+        headers = {h: response.headers[h] for h in HEADERS if response.has_header(h)}
+        if "Vary" in headers:
+            # The files are served as they are, never compressed.
+            vary = cc_delim_re.split(headers.pop("Vary"))
+            vary = [h for h in vary if h.lower() != "accept-encoding"]
+            if vary:
+                headers["Vary"] = ", ".join(vary)
+        return {
+            "file": f"pages/{name}.html",
+            "etag": sha256(content).hexdigest(),
+            "headers": headers,
+        }
+
+    exporting_token = exporting.set(True)
+    try:
+        with LayoutResponse.deferring_csrf():
+            for name, routed in prerendered_routes():
+                for kwargs in routed.prerender():  # type: ignore
+                    url = reverse(name, kwargs=kwargs)
+                    variants = {
+                        outlet: variant
+                        for outlet in (FULL, *routed.outlets)  # type: ignore
+                        if (variant := render(url, outlet)) is not None
+                    }
+                    if variants:
+                        manifest[url] = {
+                            "version": version(routed, factory.get(url), kwargs),
+                            "variants": variants,
+                        }
+    finally:
+        exporting.reset(exporting_token)
+    (directory / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return len(manifest)
+
+
+class PrerenderedMiddleware:
+    """Serve pages rendered in advance, with the token for the request.
+
+    The manifest is read again whenever it changes, so pages can be
+    exported again without restarting.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[..., Any]):
+        directory = getattr(settings, "TEMPLOCO_PRERENDERED_DIR", None)
+        if directory is None:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.__directory = Path(directory)
+        self.__manifest: dict[str, Any] = {}
+        self.__mtime: Optional[float] = None
+        if iscoroutinefunction(get_response):  # pyright: ignore[reportDeprecated]
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):  # pyright: ignore[reportDeprecated]
+            return self.__acall(request)
+        return self.__serve(request) or self.get_response(request)
+
+    async def __acall(self, request: HttpRequest) -> HttpResponseBase:
+        # Checking the version of a page may query the database.
+        response = await sync_to_async(self.__serve)(request)
+        return response or await self.get_response(request)
+
+    def __load(self) -> dict[str, Any]:
+        try:
+            mtime = (self.__directory / MANIFEST).stat().st_mtime
+        except FileNotFoundError:
+            return {}
+        if mtime != self.__mtime:
+            self.__manifest = json.loads((self.__directory / MANIFEST).read_text())
+            self.__mtime = mtime
+        return self.__manifest
+
+    def __serve(self, request: HttpRequest) -> Optional[HttpResponseBase]:
+        if (
+            exporting.get()
+            or request.method not in ("GET", "HEAD")
+            or request.META.get("QUERY_STRING")
+            or request.user.is_authenticated
+            or request.headers.get("HX-Trigger")
+        ):
+            return None
+        page = self.__load().get(request.path)
+        if page is None:
+            return None
+        outlet = FULL
+        if request.headers.get("HX-Request") == "true":
+            # Only the content of outlets was rendered for htmx.
+            outlet = request.headers.get("HX-Target") or None
+        variant = page["variants"].get(outlet)
+        if variant is None:
+            return None
+        if page["version"] is not None:
+            try:
+                match = resolve(request.path_info)
+            except Resolver404:
+                return None
+            if version(match.func, request, match.kwargs) != page["version"]:
+                return None
+        try:
+            content = (self.__directory / variant["file"]).read_text()
+        except FileNotFoundError:
+            return None
+        filled = LayoutResponse.fill_csrf_token(content, request)
+        response = HttpResponse(filled, headers=variant["headers"])
+        if filled == content:
+            etag = f'"{variant["etag"]}"'
+            patch_cache_control(response, public=True, max_age=0)
+        else:
+            # The token is different every time, but it's valid for as
+            # long as the secret in the cookie it comes from.
+            secret = request.META.get("CSRF_COOKIE", "")
+            digest = sha256(f"{variant['etag']}\0{secret}".encode()).hexdigest()
+            etag = f'W/"{digest}"'
+            patch_cache_control(response, private=True, max_age=0)
+            patch_vary_headers(response, ("Cookie",))
+        response["ETag"] = etag
+        return get_conditional_response(request, etag=etag, response=response)
@@ -0,0 +1,262 @@
+"""Reading from replicas, while clients still see their own writes.
+
+``ReplicaRouter`` sends reads of this app's models to the databases
+listed in the ``TEMPLOCO_READ_REPLICAS`` setting, and writes to the
+default database. Other apps, like sessions and auth, are left alone.
+Replicas lag behind, so ``ReadYourWritesMiddleware`` remembers the
+recent writes of each client in a signed cookie:
+
+* For ``TEMPLOCO_PIN_SECONDS`` after a write, the client reads from the
+  default database, so it sees everything that it wrote.
+* For ``TEMPLOCO_RECENT_WRITES_SECONDS``, results read from a replica
+  can be ``overlay``-ed with the rows that the client created, edited
+  and deleted, for replicas that lag further behind than that.
+
+Pages that are shared between clients, such as in a ``ViewCache``, are
+read from the default database ``reading_primary``, since a replica
+might not have the writes of other clients that invalidated them yet.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Generator, Optional, TypeVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpRequest
+from django.http.response import HttpResponseBase
+
+M = TypeVar("M", bound=Model)
+
+COOKIE = "temploco_writes"
+SALT = "temploco.replicas"
+# Only the latest writes are kept, so the cookie stays small.
+LIMIT = 100
+# The apps whose models are read from replicas.
+APPS = ("temploco",)
+
+
+def replicated(model: type[Model]) -> bool:
+    return model._meta.app_label in APPS
+
+
+def replicas() -> list[str]:
+    return getattr(settings, "TEMPLOCO_READ_REPLICAS", [])
+
+
+def pin_seconds() -> float:
+    return getattr(settings, "TEMPLOCO_PIN_SECONDS", 5)
+
+
+def recent_writes_seconds() -> int:
+    return getattr(settings, "TEMPLOCO_RECENT_WRITES_SECONDS", 60)
+
+
+@dataclass
+class Writes:
+    """The writes that a client made recently, by model label."""
+
+    created: dict[str, list[Any]] = field(default_factory=dict[str, list[Any]])
+    edited: dict[str, list[Any]] = field(default_factory=dict[str, list[Any]])
+    deleted: dict[str, list[Any]] = field(default_factory=dict[str, list[Any]])
+    pinned_until: float = 0
+    wrote: bool = False
+
+    @property
+    def pinned(self) -> bool:
+        """Whether reads have to see the client's writes already."""
+        return self.wrote or time.time() < self.pinned_until
+
+    def record(self, kind: str, model: type[Model], pk: Any) -> None:
+        pks = getattr(self, kind).setdefault(model._meta.label_lower, [])
+        if pk in pks:
+            pks.remove(pk)
+        pks.append(pk)
+        del pks[:-LIMIT]
+        self.wrote = True
+
+    def of(self, model: type[Model]) -> tuple[set[Any], set[Any], set[Any]]:
+        """The created, edited and deleted primary keys of a model."""
+        label = model._meta.label_lower
+        return (
+            set(self.created.get(label, ())),
+            set(self.edited.get(label, ())),
+            set(self.deleted.get(label, ())),
+        )
+
+    def dumps(self) -> dict[str, Any]:
+        return {
+            "created": self.created,
+            "edited": self.edited,
+            "deleted": self.deleted,
+            "pinned_until": self.pinned_until,
+        }
+
+    @classmethod
+    def loads(cls, request: HttpRequest) -> Writes:
+        value = request.get_signed_cookie(
+            COOKIE, default=None, salt=SALT, max_age=recent_writes_seconds()
+        )
+        if value is None:
+            return cls()
+        try:
+            return cls(**json.loads(value))
+        except (TypeError, ValueError):
+            return cls()
+
+
+current: ContextVar[Optional[Writes]] = ContextVar("writes", default=None)
+primary: ContextVar[bool] = ContextVar("primary", default=False)
+
+
+@contextmanager
+def reading_primary() -> Generator[None, None, None]:
+    """Read from the default database, whatever the client wrote."""
+    token = primary.set(True)
+    try:
+        yield
+    finally:
+        primary.reset(token)
+
+
+class ReplicaRouter:
+    """Read from a replica, unless the client has to see its own writes."""
+
+    def db_for_read(self, model: type[Model], **hints: Any) -> Optional[str]:
+        if not replicated(model):
+            return None
+        aliases = replicas()
+        writes = current.get()
+        if not aliases or primary.get() or (writes is not None and writes.pinned):
+            return DEFAULT_DB_ALIAS
+        return random.choice(aliases)
+
+    def db_for_write(self, model: type[Model], **hints: Any) -> Optional[str]:
+        if not replicated(model):
+            return None
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> bool:
+        return True
+
+    def allow_migrate(self, db: str, app_label: str, **hints: Any) -> bool:
+        # Replicas get their schema from the default database.
+        return db not in replicas()
+
+
+@receiver(post_save)
+def record_save(
+    sender: type[Model], instance: Model, created: bool, **kwargs: Any
+) -> None:
+    if replicated(sender) and (writes := current.get()) is not None:
+        writes.record("created" if created else "edited", sender, instance.pk)
+
+
+@receiver(post_delete)
+def record_delete(sender: type[Model], instance: Model, **kwargs: Any) -> None:
+    if replicated(sender) and (writes := current.get()) is not None:
+        writes.record("deleted", sender, instance.pk)
+
+
+def reads_own_writes(request: HttpRequest, /) -> bool:
+    """Whether the client has writes that a replica might not have yet.
+
+    Pages rendered for other clients might have been read from such a
+    replica, so they aren't to be shared with this client.
+    """
+    writes = current.get()
+    return (
+        bool(replicas())
+        and writes is not None
+        and bool(writes.pinned or writes.created or writes.edited or writes.deleted)
+    )
+
+
+def overlay(
+    items: list[M],
+    model: type[M],
+    /,
+    *,
+    include: Optional[Callable[[M], bool]] = None,
+) -> list[M]:
+    """Apply the client's recent writes to rows read from a replica.
+
+    Deleted rows are dropped, and edited rows are read again from the
+    default database. Created rows are added if include accepts them,
+    such as when they belong on the page being shown, after the rest.
+    """
+    writes = current.get()
+    if not replicas() or writes is None or writes.pinned:
+        return items
+    created, edited, deleted = writes.of(model)
+    items = [item for item in items if item.pk not in deleted]
+    shown = {item.pk for item in items}
+    stale = shown & edited
+    fresh = (created - shown - deleted) if include else set[Any]()
+    if not stale and not fresh:
+        return items
+    primary = {
+        obj.pk: obj
+        for obj in model._default_manager.using(DEFAULT_DB_ALIAS).filter(
+            pk__in=stale | fresh
+        )
+    }
+    items = [primary.get(item.pk, item) for item in items]
+    if include:
+        items.extend(primary[pk] for pk in fresh if pk in primary)
+        items = [item for item in items if item.pk not in fresh or include(item)]
+    return items
+
+
+class ReadYourWritesMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[..., Any]):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):  # pyright: ignore[reportDeprecated]
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):  # pyright: ignore[reportDeprecated]
+            return self.__acall(request)
+        writes = Writes.loads(request)
+        token = current.set(writes)
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.__remember(writes, response)
+
+    async def __acall(self, request: HttpRequest) -> HttpResponseBase:
+        writes = Writes.loads(request)
+        token = current.set(writes)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.__remember(writes, response)
+
+    def __remember(
+        self, writes: Writes, response: HttpResponseBase
+    ) -> HttpResponseBase:
+        if writes.wrote:
+            writes.pinned_until = time.time() + pin_seconds()
+            response.set_signed_cookie(
+                COOKIE,
+                json.dumps(writes.dumps()),
+                salt=SALT,
+                max_age=recent_writes_seconds(),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
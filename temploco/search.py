@@ -0,0 +1,188 @@
+"""Full-text search for contacts.
+
+On SQLite with FTS5, contacts are indexed in an FTS5 table, which gives
+ranked prefix matching. Elsewhere, the terms of each contact are stored
+in an indexed table, and matched by prefix without ranking.
+
+The index is kept in sync when contacts are saved or deleted. Anything
+that skips those signals, like ``bulk_create``, needs to ``index`` the
+contacts itself, and ``rebuild`` starts the index over from scratch.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Iterable
+from django.apps import apps
+from django.db import connections, router
+from django.db.models import (
+    CASCADE,
+    CharField,
+    Exists,
+    FloatField,
+    ForeignKey,
+    Model,
+    OuterRef,
+    QuerySet,
+    Value,
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+FTS_TABLE = "temploco_contact_fts"
+FIELDS = ("first", "last", "email", "phone")
+TERM = re.compile(r"\w+")
+
+# Whether each database has the full-text table, by alias. Looking
+# through the tables is too slow to do for every search and save.
+fts_tables: dict[str, bool] = {}
+
+
+class ContactTerm(Model):
+    """A term from a contact, for databases without full-text search."""
+
+    contact: ForeignKey[Any] = ForeignKey(
+        "temploco.Contact", on_delete=CASCADE, related_name="+"
+    )
+    term = CharField(max_length=256, db_index=True)
+
+
+def terms(text: str) -> list[str]:
+    return TERM.findall(text.lower())
+
+
+def has_fts(using: str) -> bool:
+    if using not in fts_tables:
+        connection = connections[using]
+        fts_tables[using] = (
+            connection.vendor == "sqlite"
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return fts_tables[using]
+
+
+@receiver(post_migrate)
+def forget_fts(**kwargs: Any) -> None:
+    # Migrations may have created or dropped the full-text table.
+    fts_tables.clear()
+
+
+def contact_model() -> type[Model]:
+    return apps.get_model("temploco", "Contact")
+
+
+def database() -> str:
+    """The database that contacts are written to, and indexed in."""
+    return router.db_for_write(contact_model())
+
+
+def index(contacts: Iterable[Any], /, *, using: str | None = None) -> None:
+    """Add contacts to the index, or update them if already there."""
+    contacts = list(contacts)
+    if not contacts:
+        return
+    using = using or database()
+    if has_fts(using):
+        with connections[using].cursor() as cursor:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, {', '.join(FIELDS)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(FIELDS))})",
+                [
+                    [contact.pk, *(getattr(contact, f) for f in FIELDS)]
+                    for contact in contacts
+                ],
+            )
+        return
+    ContactTerm.objects.using(using).filter(
+        contact__in=[contact.pk for contact in contacts]
+    ).delete()
+    ContactTerm.objects.using(using).bulk_create(
+        ContactTerm(contact_id=contact.pk, term=term)
+        for contact in contacts
+        for term in {
+            term for field in FIELDS for term in terms(getattr(contact, field))
+        }
+    )
+
+
+def unindex(ids: Iterable[int], /, *, using: str | None = None) -> None:
+    """Remove contacts from the index."""
+    ids = list(ids)
+    using = using or database()
+    if has_fts(using):
+        with connections[using].cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [[id] for id in ids]
+            )
+    # Terms are deleted along with their contact by the foreign key.
+
+
+def rebuild(*, batch_size: int = 1000) -> int:
+    """Index every contact from scratch, returning how many there are."""
+    Contact = contact_model()
+    using = router.db_for_write(Contact)
+    forget_fts()
+    if has_fts(using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    else:
+        ContactTerm.objects.using(using).all().delete()
+    count = 0
+    batch: list[Any] = []
+    for contact in Contact.objects.using(using).iterator(chunk_size=batch_size):
+        batch.append(contact)
+        if len(batch) >= batch_size:
+            index(batch, using=using)
+            count += len(batch)
+            batch = []
+    index(batch, using=using)
+    return count + len(batch)
+
+
+def search(queryset: QuerySet[Any], query: str, /) -> QuerySet[Any]:
+    """Filter contacts to those matching every term in the query.
+
+    Each term matches as a prefix of any word in the first name, last
+    name, email, or phone. The results are annotated with a search_rank,
+    where lower ranks are better matches.
+    """
+    query_terms = terms(query)
+    if not query_terms:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+    if has_fts(queryset.db):
+        match = " ".join(f'"{term}"*' for term in query_terms)
+        table = queryset.model._meta.db_table
+        return queryset.annotate(
+            search_rank=RawSQL(
+                f"SELECT rank FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+                [match],
+                output_field=FloatField(),
+            )
+        ).filter(
+            id__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+            )
+        )
+    for term in query_terms:
+        queryset = queryset.filter(
+            Exists(
+                ContactTerm.objects.filter(
+                    contact=OuterRef("pk"), term__startswith=term
+                )
+            )
+        )
+    return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+@receiver(post_save, sender="temploco.Contact")
+def index_saved(sender: type[Model], instance: Any, using: str, **kwargs: Any) -> None:
+    index([instance], using=using)
+
+
+@receiver(post_delete, sender="temploco.Contact")
+def unindex_deleted(
+    sender: type[Model], instance: Any, using: str, **kwargs: Any
+) -> None:
+    unindex([instance.pk], using=using)
@@ -1,10 +1,57 @@
-from typing import Any
+from typing import Any, Optional
 from django import template
+from django.urls import reverse
 from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+from temploco.layout import STANDALONE
 
 register = template.Library()
 
 
 @register.simple_tag(takes_context=True)
-def outlet(context: dict[str, Any]) -> str:
-    return format_html(context['__outlet_divider__'])
+def outlet(context: dict[str, Any], name: Optional[str] = None) -> str:
+    # The divider is markup of the layout itself, not user input.
+    divider = mark_safe(context["__outlet_divider__"])
+    if name is None:
+        return divider
+    # Named outlets can be targeted by htmx, which sends the id of the
+    # target, so the route with the same outlet name can skip its layout.
+    # The version of the layout lets the client say which layouts it
+    # already has, so that only the ones below them are sent.
+    version = context.get("__outlet_versions__", {}).get(name)
+    if version:
+        return format_html(
+            '<hmix-outlet id="{}" name="{}" data-version="{}">{}</hmix-outlet>',
+            name,
+            name,
+            version,
+            divider,
+        )
+    return format_html(
+        '<hmix-outlet id="{}" name="{}">{}</hmix-outlet>',
+        name,
+        name,
+        divider,
+    )
+
+
+@register.simple_tag
+def lazy(
+    url_name: str, *args: Any, trigger: str = "load", label: str = "Load", **kwargs: Any
+) -> str:
+    """A placeholder that loads a lazy route when it's triggered.
+
+    Without JavaScript, the placeholder is a link to the lazy route as a
+    page of its own.
+    """
+    url = reverse(url_name, args=args, kwargs=kwargs)
+    return format_html(
+        '<div hx-get="{}" hx-trigger="{}" hx-target="this" hx-swap="outerHTML">'
+        '<noscript><a href="{}?{}">{}</a></noscript>'
+        "</div>",
+        url,
+        trigger,
+        url,
+        STANDALONE,
+        label,
+    )
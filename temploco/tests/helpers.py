@@ -0,0 +1,24 @@
+import warnings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
+
+
+def body(response: HttpResponseBase) -> bytes:
+    """The whole body of a response, streamed or not."""
+    if isinstance(response, StreamingHttpResponse):
+        # Async streams are read synchronously here, which Django warns
+        # about, but the test client reads them that way anyway.
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return b"".join(response)
+    assert isinstance(response, HttpResponse)
+    return response.content
+
+
+async def abody(response: HttpResponseBase) -> bytes:
+    """The whole body of a response, read asynchronously if streamed."""
+    if isinstance(response, StreamingHttpResponse):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return b"".join([chunk async for chunk in response])
+    return body(response)
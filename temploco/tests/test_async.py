@@ -0,0 +1,92 @@
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.client import AsyncClient
+from temploco.contacts import Contact
+from temploco.layout import LayoutResponse, PartialResponse, Route
+from .helpers import abody, body
+
+
+async def alayout(request: HttpRequest) -> LayoutResponse:
+    return LayoutResponse("<body><django-layout></django-layout></body>")
+
+
+def layout(request: HttpRequest) -> LayoutResponse:
+    return LayoutResponse("<main><django-layout></django-layout></main>")
+
+
+async def apage(request: HttpRequest) -> PartialResponse:
+    return PartialResponse("async")
+
+
+def page(request: HttpRequest) -> PartialResponse:
+    return PartialResponse("sync")
+
+
+urlpatterns = [
+    Route(
+        path="",
+        layout=alayout,
+        children=[
+            Route(
+                path="sync/",
+                layout=layout,
+                children=[Route(path="page", view=page, name="sync")],
+            ),
+            Route(path="page", view=apage, name="async"),
+        ],
+    ).path(),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncRouteTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_sync_and_async_mix(self) -> None:
+        self.assertEqual(
+            self.client.get("/sync/page").content, b"<body><main>sync</main></body>"
+        )
+        self.assertEqual(self.client.get("/page").content, b"<body>async</body>")
+
+    async def test_served_under_asgi(self) -> None:
+        response = await AsyncClient().get("/sync/page")
+        self.assertEqual(response.content, b"<body><main>sync</main></body>")
+
+
+# Cached pages are only invalidated once changes are committed.
+class ContactViewTests(TransactionTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.contact = Contact.objects.create(
+            first="Ada", last="Lovelace", phone="555", email="ada@example.com"
+        )
+        self.url = f"/contacts/{self.contact.pk}/"
+
+    async def test_detail(self) -> None:
+        response = await AsyncClient().get(self.url)
+        self.assertIn(b"Ada Lovelace", await abody(response))
+        response = await AsyncClient().get(f"/contacts/{self.contact.pk + 1}/")
+        self.assertEqual(response.status_code, 404)
+
+    async def test_edit_renders_the_contact_inline(self) -> None:
+        response = await AsyncClient().post(
+            f"{self.url}edit",
+            {"first_name": "Grace", "last_name": "Hopper", "phone": "", "email": ""},
+            headers={"HX-Request": "true"},
+        )
+        self.assertEqual(response["HX-Push-Url"], self.url)
+        self.assertIn(b"Grace Hopper", await abody(response))
+
+    def test_new_and_delete(self) -> None:
+        response = self.client.post(
+            "/contacts/new",
+            {"first_name": "Alan", "last_name": "Turing", "phone": "", "email": ""},
+        )
+        self.assertRedirects(response, "/contacts/", status_code=303)
+        self.assertTrue(Contact.objects.filter(first="Alan").exists())
+        response = self.client.post(f"{self.url}delete")
+        self.assertRedirects(response, "/contacts/", status_code=303)
+        self.assertFalse(Contact.objects.filter(pk=self.contact.pk).exists())
+        self.assertNotIn(b"Ada", body(self.client.get("/contacts/")))
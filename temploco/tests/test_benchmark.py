@@ -0,0 +1,69 @@
+import tempfile
+from dataclasses import replace
+from pathlib import Path
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from temploco import benchmark
+
+
+class RouteBenchmarkTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_synthetic_routes(self) -> None:
+        url = benchmark.last_leaf(3, 2)
+        self.assertEqual(url, "/level1-1/level2-1/leaf1/")
+        with override_settings(ROOT_URLCONF=benchmark.synthetic_urlconf(3, 2, 10)):
+            full = benchmark.consume(self.client.get(url))
+            htmx = benchmark.consume(
+                self.client.get(
+                    url, headers={"HX-Request": "true", "HX-Target": "level2"}
+                )
+            )
+        self.assertEqual(full.count(b"x" * 10), 3)
+        self.assertNotIn(b"x" * 10, htmx)
+        self.assertIn(htmx.strip(), full)
+
+    def test_route_benchmarks(self) -> None:
+        results = list(
+            benchmark.route_benchmarks(
+                2, 2, 10, requests=2, warmup=0, counter=benchmark.QueryCounter()
+            )
+        )
+        self.assertEqual(
+            [result.name for result in results],
+            [
+                "routes[depth=2,fanout=2,layout=10] compile",
+                "routes[depth=2,fanout=2,layout=10] full",
+                "routes[depth=2,fanout=2,layout=10] htmx",
+            ],
+        )
+        self.assertTrue(all(result.queries == 0 for result in results))
+
+    def test_compare_with_baseline(self) -> None:
+        result = benchmark.Result(
+            name="page",
+            requests=10,
+            requests_per_second=100.0,
+            p50_ms=5.0,
+            p99_ms=10.0,
+            allocated_kib=50.0,
+            queries=2.0,
+        )
+        path = str(Path(self.enterContext(tempfile.TemporaryDirectory())) / "b.json")
+        benchmark.save([result], path)
+        close = replace(result, requests_per_second=95.0, p99_ms=10.5)
+        self.assertEqual(benchmark.compare([close], path, tolerance=0.1), [])
+        worse = replace(result, requests_per_second=50.0, queries=3.0)
+        self.assertEqual(len(benchmark.compare([worse], path, tolerance=0.1)), 2)
+
+
+class ContactBenchmarkTests(TestCase):
+    def test_contact_benchmarks_count_queries(self) -> None:
+        counter = benchmark.QueryCounter()
+        with counter.installed():
+            results = list(
+                benchmark.contact_benchmarks(3, requests=2, warmup=0, counter=counter)
+            )
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result.queries > 0 for result in results))
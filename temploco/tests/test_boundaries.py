@@ -0,0 +1,156 @@
+from typing import Any, AsyncIterator, Callable
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.http.response import HttpResponseBase
+from django.test import SimpleTestCase, override_settings
+from django.test.client import AsyncClient
+from django.urls import URLPattern, URLResolver
+from temploco.layout import LayoutResponse, PartialResponse, Route, freshness
+from .helpers import abody, body
+
+
+def version(request: HttpRequest) -> str:
+    return "v1"
+
+
+def fallback(request: HttpRequest, **kwargs: Any) -> PartialResponse:
+    return PartialResponse("fallback")
+
+
+@freshness(etag=version, max_age=3600)
+def fine(request: HttpRequest) -> PartialResponse:
+    return PartialResponse("fine")
+
+
+@freshness(etag=version, max_age=3600)
+def broken(request: HttpRequest) -> PartialResponse:
+    raise ValueError("broken")
+
+
+def plain(request: HttpRequest) -> PartialResponse:
+    return PartialResponse("page")
+
+
+def broken_layout(request: HttpRequest) -> LayoutResponse:
+    raise ValueError("broken")
+
+
+def chunked_fallback(request: HttpRequest, **kwargs: Any) -> PartialResponse:
+    return PartialResponse(iter(["fall", "back"]))
+
+
+async def achunks() -> AsyncIterator[str]:
+    yield "fall"
+    yield "back"
+
+
+def achunked_fallback(request: HttpRequest, **kwargs: Any) -> PartialResponse:
+    return PartialResponse(achunks())
+
+
+def chunked_routes(
+    path: str, fallback: Callable[..., PartialResponse], **options: Any
+) -> URLPattern | URLResolver:
+    return Route(
+        path=path,
+        fallback=fallback,
+        children=[
+            Route(
+                path="layout/",
+                layout=broken_layout,
+                children=[Route(path="page", view=plain, name=f"{path}layout")],
+            ),
+            Route(path="view", view=broken, name=f"{path}view"),
+        ],
+        **options,
+    ).path()
+
+
+urlpatterns = [
+    chunked_routes("chunked/", chunked_fallback),
+    chunked_routes("achunked/", achunked_fallback),
+    chunked_routes("concurrent/", chunked_fallback, concurrent=True),
+    chunked_routes("aconcurrent/", achunked_fallback, concurrent=True),
+    Route(
+        path="sync/",
+        fallback=fallback,
+        children=[
+            Route(path="fine", view=fine, name="sync-fine", stream=True),
+            Route(path="broken", view=broken, name="sync-broken", stream=True),
+            Route(path="unstreamed", view=broken, name="sync-unstreamed"),
+        ],
+    ).path(),
+    Route(
+        path="async/",
+        fallback=fallback,
+        concurrent=True,
+        stream=True,
+        children=[
+            Route(path="fine", view=fine, name="async-fine"),
+            Route(path="broken", view=broken, name="async-broken"),
+        ],
+    ).path(),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class StreamedFallbackTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def assertNeverCached(self, response: HttpResponseBase) -> None:
+        self.assertFalse(response.has_header("ETag"))
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertIn("no-store", response["Cache-Control"])
+
+    def test_fallback_is_never_cached(self) -> None:
+        response = self.client.get("/sync/broken")
+        self.assertTrue(response.streaming)
+        self.assertEqual(body(response), b"fallback")
+        self.assertNeverCached(response)
+
+    def test_fallback_is_never_cached_unstreamed(self) -> None:
+        response = self.client.get("/sync/unstreamed")
+        self.assertEqual(body(response), b"fallback")
+        self.assertNeverCached(response)
+
+    def test_page_without_fallback_is_cached(self) -> None:
+        response = self.client.get("/sync/fine")
+        self.assertEqual(body(response), b"fine")
+        self.assertIn("ETag", response)
+        self.assertIn("max-age=3600", response["Cache-Control"])
+
+    async def test_async_fallback_is_never_cached(self) -> None:
+        response = await AsyncClient().get("/async/broken")
+        self.assertEqual(await abody(response), b"fallback")
+        self.assertNeverCached(response)
+
+    async def test_async_page_without_fallback_is_cached(self) -> None:
+        response = await AsyncClient().get("/async/fine")
+        self.assertEqual(await abody(response), b"fine")
+        self.assertIn("max-age=3600", response["Cache-Control"])
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class ChunkedFallbackTests(SimpleTestCase):
+    prefixes = ("chunked", "achunked", "concurrent", "aconcurrent")
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_layout_falls_back_to_chunks(self) -> None:
+        for prefix in self.prefixes:
+            response = self.client.get(f"/{prefix}/layout/page")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(body(response), b"fallbackpage")
+
+    def test_view_falls_back_to_chunks(self) -> None:
+        for prefix in self.prefixes:
+            response = self.client.get(f"/{prefix}/view")
+            self.assertTrue(response.streaming)
+            self.assertEqual(body(response), b"fallback")
+
+    async def test_async_layout_falls_back_to_chunks(self) -> None:
+        for prefix in ("concurrent", "aconcurrent"):
+            response = await AsyncClient().get(f"/{prefix}/layout/page")
+            self.assertEqual(await abody(response), b"fallbackpage")
@@ -0,0 +1,78 @@
+import json
+from typing import Any
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.test.client import AsyncClient
+from temploco.contacts import Contact
+from temploco.search import search
+from .helpers import abody, body
+
+
+class ImportTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def upload(self, name: str, content: str) -> Any:
+        file = SimpleUploadedFile(name, content.encode())
+        response = self.client.post("/contacts/import", {"file": file})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_csv(self) -> None:
+        report = self.upload(
+            "contacts.csv",
+            "\ufefffirst,last,phone,email\n"
+            "Ada,Lovelace,555,ada@example.com\n"
+            "Alan,Turing,,alan@example.com\n",
+        )
+        self.assertEqual(report["created"], 1)
+        self.assertEqual(
+            report["errors"],
+            [{"line": 3, "errors": {"phone": ["This field cannot be blank."]}}],
+        )
+        self.assertEqual(Contact.objects.get().first, "Ada")
+        # Contacts created in bulk are indexed for search all the same.
+        self.assertEqual(search(Contact.objects.all(), "lovelace").count(), 1)
+
+    def test_ndjson(self) -> None:
+        report = self.upload(
+            "contacts.ndjson",
+            '{"first": "Ada", "last": "L", "phone": "5", "email": "a@b.c"}\n'
+            '\n[1]\n{"first": \n',
+        )
+        self.assertEqual(report["created"], 1)
+        self.assertEqual([e["line"] for e in report["errors"]], [3, 4])
+
+    def test_bad_requests(self) -> None:
+        self.assertEqual(self.client.post("/contacts/import").status_code, 400)
+        file = SimpleUploadedFile("contacts.csv", b"")
+        response = self.client.post("/contacts/import", {"file": file, "format": "xml"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        Contact.objects.create(first="Ada", last="Lovelace", phone="", email="a@b.c")
+        Contact.objects.create(first="Alan", last="Turing, OBE", phone="", email="")
+
+    def test_csv(self) -> None:
+        response = self.client.get("/contacts/export.csv")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(
+            body(response).decode().splitlines(),
+            ["first,last,phone,email", "Ada,Lovelace,,a@b.c", 'Alan,"Turing, OBE",,'],
+        )
+
+    def test_ndjson(self) -> None:
+        response = self.client.get("/contacts/export.ndjson")
+        rows = [json.loads(line) for line in body(response).splitlines()]
+        self.assertEqual([row["first"] for row in rows], ["Ada", "Alan"])
+
+    async def test_async_export(self) -> None:
+        response = await AsyncClient().get("/contacts/export.ndjson")
+        self.assertEqual(len((await abody(response)).splitlines()), 2)
+
+    def test_unknown_format(self) -> None:
+        self.assertEqual(self.client.get("/contacts/export.xml").status_code, 404)
@@ -0,0 +1,116 @@
+import gzip
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.test import SimpleTestCase, override_settings
+from django.test.client import AsyncClient
+from temploco.compression import KEEP, accepts_gzip, deflate_kept, gzip_segments
+from temploco.layout import LayoutResponse, PartialResponse, Route
+from .helpers import abody, body
+
+HEAD = "<head>" + "h" * KEEP + "</head><main>"
+FOOT = "</main>" + "f" * KEEP
+
+
+def layout(request: HttpRequest) -> LayoutResponse:
+    return LayoutResponse(f"{HEAD}<django-layout></django-layout>{FOOT}")
+
+
+def page(request: HttpRequest) -> PartialResponse:
+    return PartialResponse("page " * 100)
+
+
+children = [
+    Route(path="filled", view=page, name="filled"),
+    Route(path="streamed", view=page, name="streamed", stream=True),
+]
+
+urlpatterns = [
+    Route(
+        path="sync/",
+        layout=layout,
+        outlet="main",
+        compressed=True,
+        children=children,
+    ).path(),
+    Route(
+        path="async/",
+        layout=layout,
+        compressed=True,
+        concurrent=True,
+        children=children,
+    ).path(),
+]
+
+GZIP = {"Accept-Encoding": "gzip"}
+EXPECTED = (HEAD + "page " * 100 + FOOT).encode()
+
+
+class GzipSegmentsTests(SimpleTestCase):
+    def setUp(self) -> None:
+        deflate_kept.cache_clear()
+
+    def test_round_trip(self) -> None:
+        segments = [b"a" * 1000, b"", b"partial", b"b" * 1000]
+        compressed = b"".join(gzip_segments(segments, kept={segments[0]}))
+        self.assertEqual(gzip.decompress(compressed), b"".join(segments))
+
+    def test_only_kept_segments_are_kept(self) -> None:
+        kept = b"a" * KEEP
+        for _ in range(2):
+            b"".join(gzip_segments([kept, b"b" * KEEP], kept={kept}))
+        info = deflate_kept.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 1, 1))
+
+    def test_accepts_gzip(self) -> None:
+        def request(accept: str) -> HttpRequest:
+            request = HttpRequest()
+            request.META["HTTP_ACCEPT_ENCODING"] = accept
+            return request
+
+        self.assertTrue(accepts_gzip(request("gzip, br")))
+        self.assertTrue(accepts_gzip(request("br;q=1, GZIP;q=0.5")))
+        self.assertFalse(accepts_gzip(request("gzip;q=0")))
+        self.assertFalse(accepts_gzip(request("br")))
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class CompressedRouteTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        deflate_kept.cache_clear()
+
+    def assertReusesLayout(self) -> None:
+        # The head and foot of the layout are each compressed once.
+        info = deflate_kept.cache_info()
+        self.assertEqual((info.misses, info.hits), (2, 2))
+
+    def test_filled_page(self) -> None:
+        for _ in range(2):
+            response = self.client.get("/sync/filled", headers=GZIP)
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertEqual(gzip.decompress(body(response)), EXPECTED)
+        self.assertReusesLayout()
+
+    def test_streamed_page(self) -> None:
+        for _ in range(2):
+            response = self.client.get("/sync/streamed", headers=GZIP)
+            self.assertTrue(response.streaming)
+            self.assertEqual(gzip.decompress(body(response)), EXPECTED)
+        self.assertReusesLayout()
+
+    async def test_async_streamed_page(self) -> None:
+        for _ in range(2):
+            response = await AsyncClient().get("/async/streamed", headers=GZIP)
+            self.assertEqual(gzip.decompress(await abody(response)), EXPECTED)
+        self.assertReusesLayout()
+
+    def test_uncompressed_without_gzip(self) -> None:
+        response = self.client.get("/sync/filled")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(body(response), EXPECTED)
+
+    def test_htmx_partial_keeps_nothing(self) -> None:
+        headers = {**GZIP, "HX-Request": "true", "HX-Target": "main"}
+        self.client.get("/sync/filled", headers=headers)
+        self.assertEqual(deflate_kept.cache_info().currsize, 0)
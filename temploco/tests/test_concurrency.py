@@ -0,0 +1,56 @@
+import threading
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.test import SimpleTestCase, override_settings
+from django.test.client import AsyncClient
+from temploco.layout import LayoutResponse, PartialResponse, Route
+
+# The layouts and the view each wait for the others, so the request only
+# finishes if all three run at the same time.
+barrier = threading.Barrier(3, timeout=5)
+
+
+def outer(request: HttpRequest) -> LayoutResponse:
+    barrier.wait()
+    return LayoutResponse("<body><django-layout></django-layout></body>")
+
+
+def inner(request: HttpRequest, id: int) -> LayoutResponse:
+    barrier.wait()
+    return LayoutResponse(f"<main>{id}<django-layout></django-layout></main>")
+
+
+def page(request: HttpRequest, id: int) -> PartialResponse:
+    barrier.wait()
+    return PartialResponse("page")
+
+
+urlpatterns = [
+    Route(
+        path="outer/",
+        layout=outer,
+        concurrent=True,
+        children=[
+            Route(
+                path="<int:id>/",
+                layout=inner,
+                children=[Route(path="page", view=page, name="page")],
+            )
+        ],
+    ).path(),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class ConcurrentTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        barrier.reset()
+
+    def test_layouts_and_view_run_together(self) -> None:
+        response = self.client.get("/outer/7/page")
+        self.assertEqual(response.content, b"<body><main>7page</main></body>")
+
+    async def test_layouts_and_view_run_together_under_asgi(self) -> None:
+        response = await AsyncClient().get("/outer/7/page")
+        self.assertEqual(response.content, b"<body><main>7page</main></body>")
@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.test import SimpleTestCase, override_settings
+from temploco.layout import LayoutResponse, PartialResponse, Route, freshness
+
+
+def version(request: HttpRequest) -> str:
+    return "v1"
+
+
+@freshness(etag=version, max_age=60)
+def layout(request: HttpRequest) -> LayoutResponse:
+    return LayoutResponse("<main><django-layout></django-layout></main>")
+
+
+@freshness(etag=version, max_age=60)
+def detail(request: HttpRequest) -> PartialResponse:
+    return PartialResponse("detail")
+
+
+@freshness(etag=version, max_age=60)
+def edit(request: HttpRequest) -> PartialResponse:
+    return PartialResponse("edit")
+
+
+def unversioned(request: HttpRequest) -> PartialResponse:
+    return PartialResponse("unversioned")
+
+
+urlpatterns = [
+    Route(
+        path="",
+        layout=layout,
+        outlet="main",
+        children=[
+            Route(path="detail", view=detail, name="detail"),
+            Route(path="edit", view=edit, name="edit"),
+            Route(path="unversioned", view=unversioned, name="unversioned"),
+        ],
+    ).path(),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class FreshnessTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_not_modified(self) -> None:
+        etag = self.client.get("/detail")["ETag"]
+        response = self.client.get("/detail", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_views_have_their_own_etags(self) -> None:
+        etag = self.client.get("/detail")["ETag"]
+        self.assertNotEqual(self.client.get("/edit")["ETag"], etag)
+        response = self.client.get("/edit", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_targeted_pages_vary_on_target(self) -> None:
+        for url in ("/detail", "/unversioned"):
+            vary = self.client.get(url)["Vary"]
+            self.assertIn("HX-Target", vary)
+            self.assertIn("Hmix-Layout-Versions", vary)
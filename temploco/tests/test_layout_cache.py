@@ -0,0 +1,63 @@
+import re
+from typing import Any
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.test import Client, SimpleTestCase, override_settings
+from temploco.layout import LayoutCache, LayoutResponse, PartialResponse, Route
+
+calls: list[dict[str, Any]] = []
+
+
+def layout(request: HttpRequest, **kwargs: Any) -> LayoutResponse:
+    calls.append(kwargs)
+    return LayoutResponse.render(request, "temploco/layout.html")
+
+
+def page(request: HttpRequest, **kwargs: Any) -> PartialResponse:
+    return PartialResponse("page")
+
+
+urlpatterns = [
+    Route(
+        path="<int:id>/",
+        layout=layout,
+        layout_cache=LayoutCache(timeout=60, vary_on_headers=("Accept-Language",)),
+        outlet="layout",
+        children=[Route(path="page", view=page, name="page")],
+    ).path(),
+]
+
+
+def csrf_token(content: bytes) -> str:
+    match = re.search(rb'"X-CSRFToken": "([^"]+)"', content)
+    assert match is not None
+    return match[1].decode()
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class LayoutCacheTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        calls.clear()
+
+    def test_layouts_are_rendered_once(self) -> None:
+        self.client.get("/1/page")
+        self.client.get("/1/page")
+        self.assertEqual(calls, [{"id": 1}])
+
+    def test_layouts_vary_on_kwargs_and_headers(self) -> None:
+        self.client.get("/1/page")
+        self.client.get("/2/page")
+        self.client.get("/2/page", headers={"Accept-Language": "fr"})
+        self.client.get("/2/page", headers={"Accept-Language": "fr"})
+        self.assertEqual(calls, [{"id": 1}, {"id": 2}, {"id": 2}])
+
+    def test_each_client_gets_its_own_csrf_token(self) -> None:
+        clients = [Client(enforce_csrf_checks=True) for _ in range(2)]
+        tokens = [csrf_token(client.get("/1/page").content) for client in clients]
+        self.assertEqual(len(calls), 1)
+        for client, token in zip(clients, tokens):
+            response = client.post("/1/page", headers={"X-CSRFToken": token})
+            self.assertEqual(response.status_code, 200)
+        response = clients[1].post("/1/page", headers={"X-CSRFToken": tokens[0]})
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+from temploco.layout import LayoutResponse, PartialResponse, Route
+
+children: list[int] = []
+
+
+def layout(request: HttpRequest, id: int) -> LayoutResponse:
+    return LayoutResponse("<body><django-layout></django-layout></body>")
+
+
+def parent(request: HttpRequest, id: int) -> PartialResponse:
+    template = Template('{% load layout %}parent{% lazy "child" id=id %}')
+    return PartialResponse(template.render(Context({"id": id})))
+
+
+def child(request: HttpRequest, id: int) -> PartialResponse:
+    children.append(id)
+    return PartialResponse("child")
+
+
+urlpatterns = [
+    Route(
+        path="<int:id>/",
+        layout=layout,
+        view=parent,
+        name="parent",
+        children=[Route(path="child", view=child, name="child", lazy=True)],
+    ).path(),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class LazyRouteTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        children.clear()
+
+    def test_parent_renders_a_placeholder(self) -> None:
+        content = self.client.get("/1/").content.decode()
+        self.assertTrue(content.startswith('<body>parent<div hx-get="/1/child"'))
+        self.assertIn('<a href="/1/child?standalone">', content)
+        self.assertEqual(children, [])
+
+    def test_htmx_fills_the_placeholder(self) -> None:
+        response = self.client.get("/1/child", headers={"HX-Request": "true"})
+        self.assertEqual(response.content, b"child")
+        self.assertEqual(children, [1])
+
+    def test_first_request_goes_to_the_parent(self) -> None:
+        response = self.client.get("/1/child")
+        self.assertRedirects(response, "/1/", fetch_redirect_response=False)
+        self.assertEqual(children, [])
+
+    def test_standalone_page(self) -> None:
+        response = self.client.get("/1/child?standalone")
+        self.assertEqual(response.content, b"<body>child</body>")
+
+    def test_lazy_routes_need_a_parent_view(self) -> None:
+        with self.assertRaisesMessage(Exception, "lazy routes must be the child"):
+            Route(
+                path="x/",
+                layout=layout,
+                children=[Route(path="y", view=child, name="y", lazy=True)],
+            ).path()
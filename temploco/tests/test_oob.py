@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.test import SimpleTestCase, override_settings
+from temploco.layout import LayoutResponse, PartialResponse, Route
+
+
+def site(request: HttpRequest) -> LayoutResponse:
+    return LayoutResponse("<body><django-layout></django-layout></body>")
+
+
+def section(request: HttpRequest) -> LayoutResponse:
+    return LayoutResponse("<main><django-layout></django-layout></main>")
+
+
+def page(request: HttpRequest) -> PartialResponse:
+    return PartialResponse(
+        "page",
+        oob={
+            "count": PartialResponse("3 & more"),
+            "site": PartialResponse("moved"),
+        },
+    )
+
+
+urlpatterns = [
+    Route(
+        path="site/",
+        layout=site,
+        outlet="site",
+        children=[
+            Route(
+                path="section/",
+                layout=section,
+                outlet="section",
+                children=[Route(path="page", view=page, name="page")],
+            )
+        ],
+    ).path(),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class OutOfBandTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_partials_are_swapped_out_of_band(self) -> None:
+        response = self.client.get(
+            "/site/section/page",
+            headers={"HX-Request": "true", "HX-Target": "section"},
+        )
+        self.assertEqual(
+            response.content.decode(),
+            "page"
+            '<div hx-swap-oob="innerHTML:#count">3 & more</div>'
+            '<div hx-swap-oob="innerHTML:#site"><main>moved</main></div>',
+        )
+
+    def test_full_pages_ignore_them(self) -> None:
+        response = self.client.get("/site/section/page")
+        self.assertEqual(response.content, b"<body><main>page</main></body>")
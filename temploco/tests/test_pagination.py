@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.core.exceptions import BadRequest
+from django.test import RequestFactory, TestCase
+from temploco.contacts import Contact
+from temploco.pagination import encode_cursor, paginate
+
+
+class PaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        Contact.objects.bulk_create(
+            Contact(first=f"C{i}", last="", phone="", email=f"c{i}@example.com")
+            for i in range(5)
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def page(self, **query: str) -> list[int]:
+        request = RequestFactory().get("/", query)
+        page = paginate(request, Contact.objects.all(), ordering=("id",), size=2)
+        return [contact.pk for contact in page.items]
+
+    def test_pages_follow_each_other(self) -> None:
+        ids = list(Contact.objects.order_by("id").values_list("id", flat=True))
+        first = self.page()
+        self.assertEqual(first, ids[:2])
+        second = self.page(after=encode_cursor([first[-1]]))
+        self.assertEqual(second, ids[2:4])
+        self.assertEqual(self.page(before=encode_cursor([second[0]])), first)
+
+    def test_invalid_cursors(self) -> None:
+        for cursor in (
+            "not base64!",
+            encode_cursor(["x"]),
+            encode_cursor([1, 2]),
+            encode_cursor([None]),
+            encode_cursor([[1]]),
+        ):
+            with self.assertRaises(BadRequest, msg=cursor):
+                self.page(after=cursor)
+
+    def test_invalid_cursor_is_a_bad_request(self) -> None:
+        response = self.client.get("/contacts/", {"after": encode_cursor(["x"])})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(
+            "/contacts/", {"q": "a", "before": encode_cursor(["x", "y"])}
+        )
+        self.assertEqual(response.status_code, 400)
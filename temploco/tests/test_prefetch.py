@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.test import SimpleTestCase, override_settings
+from temploco.layout import PartialResponse, Route
+
+calls: list[HttpRequest] = []
+
+
+def page(request: HttpRequest) -> PartialResponse:
+    return PartialResponse("page", prefetch=["/next", "/other"])
+
+
+def following(request: HttpRequest) -> PartialResponse:
+    calls.append(request)
+    return PartialResponse(f"next {len(calls)}")
+
+
+def other(request: HttpRequest) -> PartialResponse:
+    return PartialResponse("other")
+
+
+urlpatterns = [
+    Route(path="page", view=page, name="page").path(),
+    Route(path="next", view=following, name="next", prefetch_timeout=60).path(),
+    Route(path="other", view=other, name="other").path(),
+]
+
+PREFETCH = {"Sec-Purpose": "prefetch"}
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class PrefetchTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        calls.clear()
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = "a" * 32
+
+    def test_prefetchable_routes_are_announced(self) -> None:
+        response = self.client.get("/page")
+        self.assertEqual(response["Link"], "</next>; rel=prefetch")
+        response = self.client.get("/page", headers={"HX-Request": "true"})
+        self.assertFalse(response.has_header("Link"))
+        self.assertEqual(response.content, b'page<link rel="prefetch" href="/next">')
+
+    def test_prefetched_partials_are_used_once(self) -> None:
+        self.assertEqual(self.client.get("/next", headers=PREFETCH).content, b"next 1")
+        self.assertEqual(self.client.get("/next").content, b"next 1")
+        self.assertEqual(self.client.get("/next").content, b"next 2")
+
+    def test_prefetches_are_private_to_the_client(self) -> None:
+        self.client.get("/next", headers=PREFETCH)
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = "b" * 32
+        self.assertEqual(self.client.get("/next").content, b"next 2")
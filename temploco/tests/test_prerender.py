@@ -0,0 +1,74 @@
+import tempfile
+from pathlib import Path
+from typing import Any
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.test import Client, SimpleTestCase, override_settings
+from temploco.layout import LayoutResponse, PartialResponse, Route
+from temploco.prerender import export
+
+
+def layout(request: HttpRequest) -> LayoutResponse:
+    return LayoutResponse.render(request, "temploco/layout.html")
+
+
+def page(request: HttpRequest) -> PartialResponse:
+    return PartialResponse("page")
+
+
+def pages() -> list[dict[str, Any]]:
+    return [{}]
+
+
+urlpatterns = [
+    Route(
+        path="shared", view=page, name="shared", prerender=pages, compressed=True
+    ).path(),
+    Route(
+        path="private/",
+        layout=layout,
+        outlet="layout",
+        children=[Route(path="page", view=page, name="private", prerender=pages)],
+    ).path(),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class PrerenderedTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.assertEqual(export(Path(directory)), 2)
+        self.enterContext(override_settings(TEMPLOCO_PRERENDERED_DIR=directory))
+        self.client = Client()
+
+    def assertRevalidated(self, url: str, **headers: str) -> None:
+        etag = self.client.get(url, headers=headers)["ETag"]
+        headers["If-None-Match"] = etag
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_shared_page(self) -> None:
+        response = self.client.get("/shared")
+        self.assertEqual(response.content, b"page")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertNotIn("Accept-Encoding", response.get("Vary", ""))
+        self.assertEqual(response["Cache-Control"], "public, max-age=0")
+        self.assertRevalidated("/shared")
+
+    def test_page_with_token_is_private(self) -> None:
+        response = self.client.get("/private/page")
+        self.assertIn(b"X-CSRFToken", response.content)
+        self.assertNotIn(b"django-csrf", response.content)
+        self.assertEqual(response["Cache-Control"], "private, max-age=0")
+        self.assertIn("Cookie", response["Vary"])
+        self.assertTrue(response["ETag"].startswith("W/"))
+        self.assertRevalidated("/private/page")
+
+    def test_outlet_without_token_is_shared(self) -> None:
+        headers = {"HX-Request": "true", "HX-Target": "layout"}
+        response = self.client.get("/private/page", headers=headers)
+        self.assertEqual(response.content, b"page")
+        self.assertEqual(response["Cache-Control"], "public, max-age=0")
+        self.assertRevalidated("/private/page", **headers)
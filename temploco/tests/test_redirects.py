@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse
+from django.http.response import HttpResponseBase
+from django.test import SimpleTestCase, override_settings
+from django.test.client import AsyncClient
+from django.urls import path
+from django.views.decorators.http import require_GET
+from temploco.contacts import ahx_redirect, hx_redirect
+from temploco.layout import PartialResponse, Route
+
+
+@require_GET
+def target(request: HttpRequest) -> PartialResponse:
+    return PartialResponse("target")
+
+
+def plain(request: HttpRequest) -> HttpResponse:
+    return HttpResponse("plain")
+
+
+def write(request: HttpRequest) -> HttpResponseBase:
+    return hx_redirect(request, request.GET.get("to", ""), inline=True)
+
+
+async def awrite(request: HttpRequest) -> HttpResponseBase:
+    return await ahx_redirect(request, request.GET.get("to", ""), inline=True)
+
+
+urlpatterns = [
+    Route(path="target", view=target, name="target").path(),
+    Route(path="write", view=write, name="write").path(),
+    Route(path="awrite", view=awrite, name="awrite").path(),
+    path("plain", plain),
+]
+
+HTMX = {"HX-Request": "true"}
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class InlineRedirectTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_routes_are_rendered_inline(self) -> None:
+        for url in ("/write", "/awrite"):
+            response = self.client.post(
+                f"{url}?to=/target", headers={**HTMX, "HX-Target": "main"}
+            )
+            self.assertEqual(response.content, b"target")
+            self.assertEqual(response["HX-Push-Url"], "/target")
+            self.assertEqual(response["HX-Retarget"], "#main")
+            self.assertFalse(response.has_header("HX-Redirect"))
+
+    async def test_routes_are_rendered_inline_under_asgi(self) -> None:
+        response = await AsyncClient().post("/awrite?to=/target", headers=HTMX)
+        self.assertEqual(response.content, b"target")
+        self.assertEqual(response["HX-Push-Url"], "/target")
+
+    def test_other_urls_are_redirected(self) -> None:
+        for to in ("/plain", "https://example.com/target", "/missing"):
+            response = self.client.post(f"/write?to={to}", headers=HTMX)
+            self.assertEqual(response["HX-Redirect"], to)
+            self.assertEqual(response.content, b"")
+
+    def test_only_htmx_is_rendered_inline(self) -> None:
+        response = self.client.post("/write?to=/target")
+        self.assertRedirects(response, "/target", fetch_redirect_response=False)
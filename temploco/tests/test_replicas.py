@@ -0,0 +1,128 @@
+import time
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpRequest
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.client import AsyncClient
+from temploco.contacts import Contact
+from temploco.layout import PartialResponse, Route, ViewCache
+from temploco.replicas import (
+    COOKIE,
+    ReplicaRouter,
+    Writes,
+    current,
+    overlay,
+    primary,
+    reading_primary,
+    reads_own_writes,
+)
+
+reads: list[bool] = []
+
+
+def bypass(request: HttpRequest) -> bool:
+    return "bypass" in request.GET
+
+
+cached = ViewCache(bypass=bypass, filling=reading_primary)
+
+
+def page(request: HttpRequest) -> PartialResponse:
+    reads.append(primary.get())
+    return PartialResponse("page")
+
+
+async def apage(request: HttpRequest) -> PartialResponse:
+    reads.append(primary.get())
+    return PartialResponse("page")
+
+
+urlpatterns = [
+    Route(path="page", view=page, name="page", view_cache=cached).path(),
+    Route(path="apage", view=apage, name="apage", view_cache=cached).path(),
+]
+
+
+@override_settings(TEMPLOCO_READ_REPLICAS=["replica"])
+class ReplicaRouterTests(SimpleTestCase):
+    def test_reads_from_replicas(self) -> None:
+        self.assertEqual(ReplicaRouter().db_for_read(Contact), "replica")
+
+    def test_reading_primary(self) -> None:
+        with reading_primary():
+            self.assertEqual(ReplicaRouter().db_for_read(Contact), DEFAULT_DB_ALIAS)
+        self.assertEqual(ReplicaRouter().db_for_read(Contact), "replica")
+
+    def test_pinned_clients_read_from_default(self) -> None:
+        token = current.set(Writes(pinned_until=time.time() + 5))
+        self.addCleanup(current.reset, token)
+        self.assertEqual(ReplicaRouter().db_for_read(Contact), DEFAULT_DB_ALIAS)
+        current.set(Writes(pinned_until=time.time() - 5))
+        self.assertEqual(ReplicaRouter().db_for_read(Contact), "replica")
+
+    def test_writes_go_to_default(self) -> None:
+        self.assertEqual(ReplicaRouter().db_for_write(Contact), DEFAULT_DB_ALIAS)
+        self.assertFalse(ReplicaRouter().allow_migrate("replica", "temploco"))
+
+
+@override_settings(TEMPLOCO_READ_REPLICAS=["replica"])
+class ReadYourWritesTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.kept, self.edited, self.deleted = (
+            Contact.objects.create(first=name, last="", phone="", email="")
+            for name in ("kept", "edited", "deleted")
+        )
+
+    def test_writes_are_remembered_in_a_cookie(self) -> None:
+        self.client.post(
+            "/contacts/new",
+            {"first_name": "new", "last_name": "", "phone": "", "email": ""},
+        )
+        created = Contact.objects.using(DEFAULT_DB_ALIAS).get(first="new")
+        self.assertIn(COOKIE, self.client.cookies)
+        request = HttpRequest()
+        request.COOKIES[COOKIE] = self.client.cookies[COOKIE].value
+        writes = Writes.loads(request)
+        self.assertEqual(writes.of(Contact), ({created.pk}, set(), set()))
+        self.assertTrue(writes.pinned)
+
+    def test_overlay_shows_the_clients_writes(self) -> None:
+        # The list as a lagging replica would have it.
+        stale = list(Contact.objects.using(DEFAULT_DB_ALIAS).order_by("id"))
+        Contact.objects.filter(pk=self.edited.pk).update(first="changed")
+        created = Contact.objects.create(first="created", last="", phone="", email="")
+        writes = Writes(
+            created={"temploco.contact": [created.pk]},
+            edited={"temploco.contact": [self.edited.pk]},
+            deleted={"temploco.contact": [self.deleted.pk]},
+        )
+        token = current.set(writes)
+        self.addCleanup(current.reset, token)
+        request = HttpRequest()
+        self.assertTrue(reads_own_writes(request))
+        shown = overlay(stale, Contact, include=lambda contact: True)
+        self.assertEqual(
+            [contact.first for contact in shown], ["kept", "changed", "created"]
+        )
+        shown = overlay(stale, Contact)
+        self.assertEqual([contact.first for contact in shown], ["kept", "changed"])
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class FillingTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        reads.clear()
+
+    def test_cached_partials_are_read_from_primary(self) -> None:
+        self.client.get("/page")
+        self.client.get("/page")
+        self.client.get("/page", {"bypass": "1"})
+        # The second request is a hit, and the bypass isn't cached.
+        self.assertEqual(reads, [True, False])
+
+    async def test_async_cached_partials_are_read_from_primary(self) -> None:
+        await AsyncClient().get("/apage")
+        await AsyncClient().get("/apage", {"bypass": "1"})
+        self.assertEqual(reads, [True, False])
@@ -0,0 +1,57 @@
+from typing import Any
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.test import SimpleTestCase, override_settings
+from django.urls import resolve, reverse
+from temploco.layout import LayoutResponse, PartialResponse, Route
+
+
+def outer(request: HttpRequest, **kwargs: Any) -> LayoutResponse:
+    return LayoutResponse(
+        f"{sorted(kwargs)}<main><django-layout></django-layout></main>"
+    )
+
+
+def inner(request: HttpRequest, **kwargs: Any) -> LayoutResponse:
+    return LayoutResponse(f"{sorted(kwargs)}<p><django-layout></django-layout></p>")
+
+
+def page(request: HttpRequest, **kwargs: Any) -> PartialResponse:
+    return PartialResponse(f"{sorted(kwargs)}")
+
+
+urlpatterns = [
+    Route(
+        path="<int:a>/",
+        layout=outer,
+        children=[
+            Route(
+                path="<int:b>/",
+                layout=inner,
+                children=[
+                    Route(path="<int:c>", view=page, name="page"),
+                    Route(path="plain", view=page, name="plain"),
+                ],
+            )
+        ],
+    ).path(),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class CompiledRouteTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_levels_get_the_kwargs_of_their_paths(self) -> None:
+        response = self.client.get(reverse("page", kwargs={"a": 1, "b": 2, "c": 3}))
+        self.assertEqual(
+            response.content,
+            b"['a']<main>['a', 'b']<p>['a', 'b', 'c']</p></main>",
+        )
+
+    def test_leaves_hold_their_whole_chain(self) -> None:
+        match = resolve("/1/2/plain")
+        self.assertEqual(match.url_name, "plain")
+        self.assertEqual(match.kwargs, {"a": 1, "b": 2})
+        self.assertEqual(len(getattr(match.func, "layouts")), 3)
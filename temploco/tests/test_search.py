@@ -0,0 +1,61 @@
+from typing import Any
+from unittest import mock
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.test import TestCase
+from temploco.contacts import Contact
+from temploco.search import has_fts, rebuild, search
+from .helpers import body
+
+
+class SearchTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.ada = Contact.objects.create(
+            first="Ada", last="Lovelace", phone="555", email="ada@example.com"
+        )
+        self.alan = Contact.objects.create(
+            first="Alan", last="Turing", phone="556", email="alan@example.org"
+        )
+
+    def found(self, query: str) -> set[Any]:
+        return {c.pk for c in search(Contact.objects.all(), query)}
+
+    def assertFinds(self) -> None:
+        self.assertEqual(self.found("ada"), {self.ada.pk})
+        self.assertEqual(self.found("lov"), {self.ada.pk})
+        self.assertEqual(self.found("a"), {self.ada.pk, self.alan.pk})
+        self.assertEqual(self.found("example org"), {self.alan.pk})
+        self.assertEqual(self.found("ada turing"), set())
+        self.assertEqual(self.found(""), {self.ada.pk, self.alan.pk})
+
+    def test_full_text_search(self) -> None:
+        self.assertTrue(has_fts(DEFAULT_DB_ALIAS))
+        self.assertFinds()
+
+    def test_term_search(self) -> None:
+        with mock.patch("temploco.search.has_fts", return_value=False):
+            rebuild()
+            self.assertFinds()
+
+    def test_index_follows_saves_and_deletes(self) -> None:
+        self.ada.first = "Grace"
+        self.ada.save()
+        self.assertEqual(self.found("ada"), {self.ada.pk})  # Still in the email.
+        self.assertEqual(self.found("grace"), {self.ada.pk})
+        self.ada.delete()
+        self.assertEqual(self.found("grace"), set())
+
+    def test_rebuild_indexes_bulk_created_contacts(self) -> None:
+        Contact.objects.bulk_create(
+            [Contact(first="Hedy", last="Lamarr", phone="", email="")]
+        )
+        self.assertEqual(self.found("hedy"), set())
+        self.assertEqual(rebuild(), 3)
+        self.assertEqual(len(self.found("hedy")), 1)
+
+    def test_contacts_list(self) -> None:
+        response = self.client.get("/contacts/", {"q": "turing"})
+        content = body(response)
+        self.assertIn(b"Alan", content)
+        self.assertNotIn(b"Lovelace", content)
@@ -0,0 +1,31 @@
+from django.test import SimpleTestCase
+from temploco.layout import LayoutResponse, compose
+
+OUTLET = "<django-layout></django-layout>"
+
+
+class SegmentTests(SimpleTestCase):
+    def test_composed_layouts_keep_their_segments(self) -> None:
+        page = compose(
+            [
+                LayoutResponse(f"<body>{OUTLET}</body>"),
+                LayoutResponse(f"<main>{OUTLET}</main>"),
+                LayoutResponse(),
+            ]
+        )
+        self.assertEqual(page.split(), (("<body>", "<main>"), ("</main>", "</body>")))
+        self.assertEqual(
+            page.segments("content"),
+            ("<body>", "<main>", "content", "</main>", "</body>"),
+        )
+        self.assertEqual(page.fill("content"), "<body><main>content</main></body>")
+
+    def test_layouts_without_content_around_the_outlet(self) -> None:
+        self.assertEqual(LayoutResponse().split(), ((), ()))
+        self.assertEqual(LayoutResponse.before_outlet("<h1>").split(), (("<h1>",), ()))
+
+    def test_layouts_need_exactly_one_outlet(self) -> None:
+        with self.assertRaisesMessage(Exception, "exactly one outlet"):
+            LayoutResponse("<body></body>")
+        with self.assertRaisesMessage(Exception, "exactly one outlet"):
+            LayoutResponse(OUTLET * 2)
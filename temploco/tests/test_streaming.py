@@ -0,0 +1,123 @@
+from typing import Iterator
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse, HttpResponseRedirect
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.client import AsyncClient
+from django.views.decorators.http import require_GET
+from temploco.contacts import Contact
+from temploco.layout import LayoutResponse, PartialResponse, Route
+from .helpers import abody, body
+
+
+def layout(request: HttpRequest) -> LayoutResponse:
+    return LayoutResponse("<main><django-layout></django-layout></main>")
+
+
+@require_GET
+def page(request: HttpRequest) -> PartialResponse:
+    return PartialResponse("page")
+
+
+def rows() -> Iterator[str]:
+    for i in range(3):
+        yield f"<p>{i}</p>"
+
+
+def chunked(request: HttpRequest) -> PartialResponse:
+    return PartialResponse(rows())
+
+
+def redirected(request: HttpRequest) -> HttpResponse:
+    return HttpResponseRedirect("/elsewhere")
+
+
+def created(request: HttpRequest) -> PartialResponse:
+    return PartialResponse("created", status=201, headers={"X-Created": "yes"})
+
+
+children = [
+    Route(path="page", view=page, name="page"),
+    Route(path="chunked", view=chunked, name="chunked"),
+    Route(path="redirected", view=redirected, name="redirected"),
+    Route(path="created", view=created, name="created"),
+]
+
+urlpatterns = [
+    Route(path="sync/", layout=layout, stream=True, children=children).path(),
+    Route(
+        path="async/", layout=layout, stream=True, concurrent=True, children=children
+    ).path(),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class StreamingTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_get_is_streamed(self) -> None:
+        for prefix in ("/sync", "/async"):
+            response = self.client.get(f"{prefix}/page")
+            self.assertTrue(response.streaming)
+            self.assertEqual(body(response), b"<main>page</main>")
+
+    def test_chunks_are_streamed_between_the_layout(self) -> None:
+        response = self.client.get("/sync/chunked")
+        self.assertEqual(
+            list(response),
+            # The empty chunk is where the prefetch links would go.
+            [b"<main>", b"<p>0</p>", b"<p>1</p>", b"<p>2</p>", b"", b"</main>"],
+        )
+
+    def test_head_is_not_streamed(self) -> None:
+        for prefix in ("/sync", "/async"):
+            response = self.client.head(f"{prefix}/page")
+            self.assertEqual(response.status_code, 405)
+            self.assertFalse(response.streaming)
+
+    def test_htmx_is_not_streamed(self) -> None:
+        response = self.client.get("/sync/page", headers={"HX-Request": "true"})
+        self.assertFalse(response.streaming)
+        self.assertEqual(body(response), b"<main>page</main>")
+
+    def test_redirect_is_sent_as_is(self) -> None:
+        for prefix in ("/sync", "/async"):
+            response = self.client.get(f"{prefix}/redirected")
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(response["Location"], "/elsewhere")
+
+    def test_partial_with_headers_is_not_streamed(self) -> None:
+        for prefix in ("/sync", "/async"):
+            response = self.client.get(f"{prefix}/created")
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response["X-Created"], "yes")
+            self.assertFalse(response.streaming)
+            self.assertEqual(body(response), b"<main>created</main>")
+
+    async def test_async_stream(self) -> None:
+        response = await AsyncClient().get("/async/chunked")
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            await abody(response), b"<main><p>0</p><p>1</p><p>2</p></main>"
+        )
+
+
+class StreamedContactsTests(TransactionTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_missing_contact_is_not_found(self) -> None:
+        self.assertEqual(self.client.get("/contacts/999/").status_code, 404)
+        self.assertEqual(self.client.get("/contacts/999/edit").status_code, 404)
+
+    def test_head_of_get_only_view_is_not_allowed(self) -> None:
+        self.assertEqual(self.client.head("/contacts/").status_code, 405)
+
+    def test_contact_is_streamed(self) -> None:
+        contact = Contact.objects.create(
+            first="Ada", last="Lovelace", phone="1", email="ada@example.com"
+        )
+        response = self.client.get(f"/contacts/{contact.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn(b"Ada Lovelace", body(response))
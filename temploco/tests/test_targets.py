@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.test import SimpleTestCase, override_settings
+from temploco.layout import LayoutResponse, PartialResponse, Route
+
+rendered: list[str] = []
+
+
+def site(request: HttpRequest) -> LayoutResponse:
+    rendered.append("site")
+    return LayoutResponse("<body><django-layout></django-layout></body>")
+
+
+def section(request: HttpRequest) -> LayoutResponse:
+    rendered.append("section")
+    return LayoutResponse("<main><django-layout></django-layout></main>")
+
+
+def page(request: HttpRequest) -> PartialResponse:
+    return PartialResponse("page")
+
+
+urlpatterns = [
+    Route(
+        path="site/",
+        layout=site,
+        outlet="site",
+        children=[
+            Route(
+                path="section/",
+                layout=section,
+                outlet="section",
+                children=[Route(path="page", view=page, name="page")],
+            )
+        ],
+    ).path(),
+]
+
+HTMX = {"HX-Request": "true"}
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class TargetTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        rendered.clear()
+
+    def get(self, **headers: str) -> bytes:
+        return self.client.get("/site/section/page", headers=headers).content
+
+    def test_whole_page(self) -> None:
+        self.assertEqual(self.get(), b"<body><main>page</main></body>")
+        self.assertEqual(rendered, ["site", "section"])
+
+    def test_layouts_above_the_target_are_skipped(self) -> None:
+        self.assertEqual(
+            self.get(**HTMX, **{"HX-Target": "site"}), b"<main>page</main>"
+        )
+        self.assertEqual(rendered, ["section"])
+
+    def test_innermost_target(self) -> None:
+        self.assertEqual(self.get(**HTMX, **{"HX-Target": "section"}), b"page")
+        self.assertEqual(rendered, [])
+
+    def test_other_targets_get_the_whole_page(self) -> None:
+        self.assertEqual(
+            self.get(**HTMX, **{"HX-Target": "elsewhere"}),
+            b"<body><main>page</main></body>",
+        )
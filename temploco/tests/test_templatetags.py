@@ -0,0 +1,29 @@
+import warnings
+from django.test import SimpleTestCase
+from temploco.layout import LayoutResponse
+
+
+def rendered(outlet: str | None) -> str:
+    layout = LayoutResponse.render(
+        None, "temploco/benchmark/level.html", {"padding": "", "outlet": outlet}
+    )
+    return layout.fill("<p>content</p>")
+
+
+class OutletTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.enterContext(warnings.catch_warnings())
+        warnings.simplefilter("error")
+
+    def test_unnamed_outlet(self) -> None:
+        self.assertIn("<p>content</p>", rendered(None))
+        self.assertNotIn("hmix-outlet", rendered(None))
+
+    def test_named_outlet(self) -> None:
+        self.assertIn(
+            '<hmix-outlet id="main" name="main"><p>content</p></hmix-outlet>',
+            rendered("main"),
+        )
+
+    def test_outlet_name_is_escaped(self) -> None:
+        self.assertIn('id="&lt;b&gt;"', rendered("<b>"))
@@ -0,0 +1,90 @@
+from typing import Any
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.test import TestCase, override_settings
+from django.test.client import AsyncClient
+from temploco.contacts import Contact
+from temploco.layout import LayoutResponse, PartialResponse, Route
+from temploco.timing import Span, Timing, request_timed
+from .helpers import abody, body
+
+
+def layout(request: HttpRequest) -> LayoutResponse:
+    return LayoutResponse("<body><django-layout></django-layout></body>")
+
+
+def page(request: HttpRequest) -> PartialResponse:
+    return PartialResponse(f"{Contact.objects.count()}")
+
+
+async def apage(request: HttpRequest) -> PartialResponse:
+    return PartialResponse(f"{await Contact.objects.acount()}")
+
+
+urlpatterns = [
+    Route(
+        path="",
+        layout=layout,
+        children=[
+            Route(path="page", view=page, name="page"),
+            Route(path="apage", view=apage, name="apage"),
+            Route(path="streamed", view=page, name="streamed", stream=True),
+        ],
+    ).path(),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class ServerTimingTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.timed: list[list[Span]] = []
+        request_timed.connect(self.receive)
+        self.addCleanup(request_timed.disconnect, self.receive)
+
+    def receive(
+        self, sender: Any, request: HttpRequest, spans: list[Span], **kwargs: Any
+    ) -> None:
+        self.timed.append(spans)
+
+    def assertTimed(self, header: str, view: str) -> None:
+        metrics = [metric.split(";")[0] for metric in header.split(", ")]
+        self.assertCountEqual(
+            metrics, ["resolve", "layout", "view", "compose", "db", "total"]
+        )
+        self.assertIn(f'desc="{view}"', header)
+        self.assertIn('desc="1 queries"', header)
+        self.assertEqual(len(self.timed), 1)
+        self.assertIn("db", [span.name for span in self.timed[0]])
+
+    def test_stages_are_timed(self) -> None:
+        response = self.client.get("/page")
+        self.assertEqual(body(response), b"<body>0</body>")
+        self.assertTimed(response["Server-Timing"], "page")
+
+    async def test_async_stages_are_timed(self) -> None:
+        response = await AsyncClient().get("/apage")
+        self.assertEqual(await abody(response), b"<body>0</body>")
+        self.assertTimed(response["Server-Timing"], "apage")
+
+    def test_streams_are_timed_once_they_finish(self) -> None:
+        response = self.client.get("/streamed")
+        self.assertEqual(self.timed, [])
+        self.assertEqual(body(response), b"<body>0</body>")
+        self.assertEqual(len(self.timed), 1)
+
+
+class HeaderTests(TestCase):
+    def test_spans_are_totalled_by_stage(self) -> None:
+        timing = Timing(started=0.0)
+        timing.spans.extend(
+            [
+                Span("db", "", 0.0, 0.001),
+                Span("db", "", 0.0, 0.002),
+                Span("layout", 'say "hi"', 0.0, 0.004),
+            ]
+        )
+        metrics = timing.header().split(", ")
+        self.assertEqual(metrics[0], 'db;dur=3.00;desc="2 queries"')
+        self.assertEqual(metrics[1], 'layout;dur=4.00;desc="say \\"hi\\""')
+        self.assertTrue(metrics[2].startswith("total;dur="))
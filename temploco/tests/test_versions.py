@@ -0,0 +1,104 @@
+import re
+from typing import Callable
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.test import SimpleTestCase, override_settings
+from temploco.layout import (
+    LAYOUT_VERSIONS,
+    LayoutResponse,
+    PartialResponse,
+    Route,
+    freshness,
+)
+
+versions = {"site": "1", "section": "1"}
+rendered: list[str] = []
+
+
+def version_of(outlet: str) -> Callable[[HttpRequest], str]:
+    def etag(request: HttpRequest) -> str:
+        return versions[outlet]
+
+    return etag
+
+
+def level(request: HttpRequest, outlet: str) -> LayoutResponse:
+    rendered.append(outlet)
+    return LayoutResponse.render(
+        request, "temploco/benchmark/level.html", {"outlet": outlet, "padding": ""}
+    )
+
+
+@freshness(etag=version_of("site"))
+def site(request: HttpRequest) -> LayoutResponse:
+    return level(request, "site")
+
+
+@freshness(etag=version_of("section"))
+def section(request: HttpRequest) -> LayoutResponse:
+    return level(request, "section")
+
+
+def page(request: HttpRequest) -> PartialResponse:
+    return PartialResponse("page")
+
+
+urlpatterns = [
+    Route(
+        path="site/",
+        layout=site,
+        outlet="site",
+        children=[
+            Route(
+                path="section/",
+                layout=section,
+                outlet="section",
+                children=[Route(path="page", view=page, name="page")],
+            )
+        ],
+    ).path(),
+]
+
+BOOSTED = {"HX-Request": "true", "HX-Boosted": "true"}
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class LayoutVersionTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        versions.update(site="1", section="1")
+        self.versions = dict(
+            re.findall(
+                r'name="(\w+)" data-version="(\w+)"',
+                self.client.get("/site/section/page").content.decode(),
+            )
+        )
+        rendered.clear()
+
+    def get(self, *outlets: str) -> tuple[bytes, str | None]:
+        header = ", ".join(f"{o}={self.versions[o]}" for o in outlets)
+        response = self.client.get(
+            "/site/section/page", headers={**BOOSTED, LAYOUT_VERSIONS: header}
+        )
+        return response.content, response.get("HX-Retarget")
+
+    def test_outlets_have_versions(self) -> None:
+        self.assertEqual(list(self.versions), ["site", "section"])
+
+    def test_only_the_content_is_sent_when_every_layout_is_current(self) -> None:
+        self.assertEqual(self.get("site", "section"), (b"page", "#section"))
+        self.assertEqual(rendered, [])
+
+    def test_only_stale_layouts_are_sent(self) -> None:
+        versions["section"] = "2"
+        content, retarget = self.get("site", "section")
+        self.assertEqual(retarget, "#site")
+        self.assertIn(b'name="section"', content)
+        self.assertEqual(rendered, ["section"])
+
+    def test_everything_is_sent_when_the_outermost_layout_is_stale(self) -> None:
+        versions["site"] = "2"
+        content, retarget = self.get("site", "section")
+        self.assertIsNone(retarget)
+        self.assertEqual(rendered, ["site", "section"])
+        self.assertIn(b'name="site"', content)
@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.test import SimpleTestCase, override_settings
+from temploco.layout import PartialResponse, Route, ViewCache, invalidate
+
+calls: list[int] = []
+
+
+def tags(request: HttpRequest, id: int) -> list[str]:
+    return [f"item:{id}"]
+
+
+def item(request: HttpRequest, id: int) -> PartialResponse:
+    calls.append(id)
+    return PartialResponse(f"item {id} #{len(calls)}")
+
+
+def missing(request: HttpRequest, id: int) -> PartialResponse:
+    calls.append(id)
+    return PartialResponse("missing", status=404)
+
+
+cached = ViewCache(tags=tags, bypass=lambda request: "fresh" in request.GET)
+
+urlpatterns = [
+    Route(path="item/<int:id>", view=item, name="item", view_cache=cached).path(),
+    Route(
+        path="missing/<int:id>", view=missing, name="missing", view_cache=cached
+    ).path(),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class ViewCacheTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        calls.clear()
+
+    def get(self, url: str, **query: str) -> bytes:
+        return self.client.get(url, query).content
+
+    def test_partials_are_cached_until_their_tags_are_invalidated(self) -> None:
+        self.assertEqual(self.get("/item/1"), b"item 1 #1")
+        self.assertEqual(self.get("/item/1"), b"item 1 #1")
+        self.assertEqual(self.get("/item/2"), b"item 2 #2")
+        invalidate("item:1")
+        self.assertEqual(self.get("/item/1"), b"item 1 #3")
+        self.assertEqual(self.get("/item/2"), b"item 2 #2")
+
+    def test_partials_vary_on_the_query_and_htmx(self) -> None:
+        self.get("/item/1")
+        self.get("/item/1", page="2")
+        self.client.get("/item/1", headers={"HX-Request": "true"})
+        self.assertEqual(calls, [1, 1, 1])
+
+    def test_bypassed_requests_neither_use_nor_fill_the_cache(self) -> None:
+        self.get("/item/1", fresh="1")
+        self.get("/item/1", fresh="1")
+        self.assertEqual(calls, [1, 1])
+
+    def test_only_successes_are_cached(self) -> None:
+        self.client.get("/missing/1")
+        self.client.get("/missing/1")
+        self.client.post("/item/1")
+        self.client.post("/item/1")
+        self.assertEqual(calls, [1, 1, 1, 1])
@@ -0,0 +1,51 @@
+import tempfile
+from pathlib import Path
+from django.conf import settings
+from django.http import HttpRequest
+from django.test import SimpleTestCase, override_settings
+from temploco.layout import LayoutResponse, PartialResponse, Route
+from temploco.warmup import route_modules, routed_views, warm_up
+
+
+def layout(request: HttpRequest) -> LayoutResponse:
+    return LayoutResponse()
+
+
+def page(request: HttpRequest) -> PartialResponse:
+    return PartialResponse("page")
+
+
+urlpatterns = [
+    Route(
+        path="outer/",
+        layout=layout,
+        children=[
+            Route(path="first", view=page, name="first"),
+            Route(
+                path="inner/", children=[Route(path="second", view=page, name="second")]
+            ),
+        ],
+    ).path(),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class WarmUpTests(SimpleTestCase):
+    def test_routes_are_found(self) -> None:
+        self.assertEqual(len(list(routed_views())), 2)
+        self.assertEqual(route_modules(), {__name__, "temploco.layout"})
+
+    def test_templates_of_the_route_apps_are_loaded(self) -> None:
+        names = [name for name, _ in warm_up()]
+        self.assertIn("temploco/layout.html", names)
+        self.assertIn("temploco/benchmark/level.html", names)
+        # Admin has no routes, so its templates are left alone.
+        self.assertNotIn("admin/base.html", names)
+
+    def test_broken_templates_fail(self) -> None:
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        (Path(directory) / "broken.html").write_text("{% if %}")
+        templates = [{**settings.TEMPLATES[0], "DIRS": [directory]}]
+        with override_settings(TEMPLATES=templates):
+            with self.assertRaisesMessage(Exception, "Template broken.html is broken"):
+                warm_up()
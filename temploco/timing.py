@@ -0,0 +1,223 @@
+"""Timing of each stage of the route pipeline.
+
+With ``ServerTimingMiddleware`` installed, every stage of a request is
+timed: resolving the URL, each layout, the view, rendering templates,
+composing layouts, and database queries. The totals are sent to the
+client in a ``Server-Timing`` header, and every span is sent with the
+``request_timed`` signal, for exporting to a metrics system.
+
+The middleware should be the last in ``MIDDLEWARE``, so that the time
+before the view is resolved is mostly spent resolving the URL.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from time import perf_counter
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Generator,
+    Iterable,
+    Iterator,
+    Optional,
+    TypeVar,
+)
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db.backends.signals import connection_created
+from django.dispatch import Signal, receiver
+from django.http import HttpRequest
+from django.http.response import HttpResponseBase, StreamingHttpResponse
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Sent when a request has been handled, with the request and its spans.
+# Streamed responses send it once the stream has finished.
+request_timed = Signal()
+# Sent when an error boundary renders its fallback, with the request,
+# the part of the route that fell back, and the error.
+fallback_rendered = Signal()
+
+
+@dataclass(frozen=True)
+class Span:
+    name: str
+    description: str
+    start: float
+    duration: float
+
+
+@dataclass
+class Timing:
+    """The spans recorded while handling a request."""
+
+    started: float = field(default_factory=perf_counter)
+    spans: list[Span] = field(default_factory=list[Span])
+
+    def record(self, name: str, description: str, start: float) -> None:
+        # Appending is atomic, so concurrent layouts can record from
+        # their own threads.
+        self.spans.append(Span(name, description, start, perf_counter() - start))
+
+    def header(self) -> str:
+        """The spans as a Server-Timing header, totalled by stage."""
+        totals: dict[tuple[str, str], tuple[float, int]] = {}
+        for span in self.spans:
+            duration, count = totals.get((span.name, span.description), (0.0, 0))
+            totals[span.name, span.description] = (duration + span.duration, count + 1)
+        metrics: list[str] = []
+        for (name, description), (duration, count) in totals.items():
+            if name == "db":
+                description = f"{count} queries"
+            metric = f"{name};dur={duration * 1000:.2f}"
+            if description:
+                escaped = description.replace("\\", "\\\\").replace('"', '\\"')
+                metric += f';desc="{escaped}"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={(perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+current: ContextVar[Optional[Timing]] = ContextVar("timing", default=None)
+
+
+@contextmanager
+def timed(name: str, description: str = "") -> Generator[None, None, None]:
+    """Time a stage of the current request, if it's being timed."""
+    timing = current.get()
+    if timing is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timing.record(name, description, start)
+
+
+def timer(name: str, description: str = "") -> Callable[[F], F]:
+    """Time every call of a function, whether it's sync or async."""
+
+    def decorator(func: F) -> F:
+        if iscoroutinefunction(func):  # pyright: ignore[reportDeprecated]
+
+            @wraps(func)
+            async def acall(*args: Any, **kwargs: Any) -> Any:
+                with timed(name, description):
+                    return await func(*args, **kwargs)
+
+            return acall  # type: ignore
+
+        @wraps(func)
+        def call(*args: Any, **kwargs: Any) -> Any:
+            with timed(name, description):
+                return func(*args, **kwargs)
+
+        return call  # type: ignore
+
+    return decorator
+
+
+def time_query(
+    execute: Callable[..., Any], sql: str, params: Any, many: bool, context: Any
+) -> Any:
+    with timed("db"):
+        return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def instrument_connection(sender: Any, connection: Any, **kwargs: Any) -> None:
+    # Layouts and views may query from threads of their own, each with
+    # its own connection, so every connection is instrumented.
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[..., Any]):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):  # pyright: ignore[reportDeprecated]
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):  # pyright: ignore[reportDeprecated]
+            return self.__acall(request)
+        timing = Timing()
+        token = current.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.__finish(request, timing, response)
+
+    async def __acall(self, request: HttpRequest) -> HttpResponseBase:
+        timing = Timing()
+        token = current.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.__finish(request, timing, response)
+
+    def process_view(
+        self,
+        request: HttpRequest,
+        view_func: Callable[..., Any],
+        view_args: Any,
+        view_kwargs: Any,
+    ) -> None:
+        if (timing := current.get()) is not None:
+            timing.record("resolve", "", timing.started)
+
+    def __finish(
+        self, request: HttpRequest, timing: Timing, response: HttpResponseBase
+    ) -> HttpResponseBase:
+        # Only what happened before the headers are sent can be in the
+        # header, so the spans of a stream are only complete in the signal.
+        metrics = timing.header()
+        if existing := response.get("Server-Timing"):
+            metrics = f"{existing}, {metrics}"
+        response["Server-Timing"] = metrics
+        if not isinstance(response, StreamingHttpResponse):
+            request_timed.send(
+                ServerTimingMiddleware, request=request, spans=timing.spans
+            )
+            return response
+
+        def stream(content: Iterable[bytes]) -> Iterator[bytes]:
+            # The stream is consumed outside of the middleware, so the
+            # timing has to be made current again while it runs.
+            current.set(timing)
+            try:
+                yield from content
+            finally:
+                current.set(None)
+                request_timed.send(
+                    ServerTimingMiddleware, request=request, spans=timing.spans
+                )
+
+        async def astream(content: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+            current.set(timing)
+            try:
+                async for chunk in content:
+                    yield chunk
+            finally:
+                current.set(None)
+                request_timed.send(
+                    ServerTimingMiddleware, request=request, spans=timing.spans
+                )
+
+        content = response.streaming_content
+        if isinstance(content, AsyncIterable):
+            response.streaming_content = astream(content)
+        else:
+            response.streaming_content = stream(content)
+        return response
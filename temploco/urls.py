@@ -1,26 +1,72 @@
-from .layout import Route
+from django.urls import path
+from .layout import Route, LayoutCache, ViewCache
 from .index import index
+from .replicas import reading_primary, reads_own_writes
 from . import contacts
 
+# Contacts are read far more often than they change, so their pages are
+# cached until a contact is saved or deleted. Cached pages are read from
+# the default database, as a replica may not have the save yet.
+contacts_cache = ViewCache(
+    timeout=300,
+    tags=contacts.contact_tags,
+    bypass=reads_own_writes,
+    filling=reading_primary,
+)
+
 
 app_name = "temploco"
 urlpatterns = [
+    path("contacts/import", contacts.import_, name="contacts-import"),
+    path("contacts/export.<str:format>", contacts.export, name="contacts-export"),
     Route(
         path="",
         layout=contacts.layout,
+        layout_cache=LayoutCache(timeout=300),
+        outlet="layout",
+        concurrent=True,
+        compressed=True,
         children=[
             Route(path="", view=index, name="index"),
-            Route(path="contacts/", view=contacts.contacts, name="contacts"),
-            Route(path="contacts/new", view=contacts.new, name="contacts-new"),
+            Route(
+                path="contacts/",
+                view=contacts.contacts,
+                name="contacts",
+                stream=True,
+                view_cache=contacts_cache,
+            ),
+            Route(
+                path="contacts/new",
+                view=contacts.new,
+                name="contacts-new",
+                stream=True,
+            ),
             Route(
                 path="contacts/<int:id>/",
                 view=contacts.detail,
                 name="contacts-detail",
+                stream=True,
+                view_cache=contacts_cache,
+                prefetch_timeout=30,
+                prerender=contacts.every_contact,
+                children=[
+                    Route(
+                        path="related",
+                        view=contacts.related,
+                        name="contacts-related",
+                        lazy=True,
+                        deadline=2,
+                        fallback="temploco/contacts/related_fallback.html",
+                    ),
+                ],
             ),
             Route(
                 path="contacts/<int:id>/edit",
                 view=contacts.edit,
                 name="contacts-edit",
+                stream=True,
+                view_cache=contacts_cache,
+                prefetch_timeout=30,
             ),
             Route(
                 path="contacts/<int:id>/delete",
@@ -0,0 +1,80 @@
+"""Loading templates before the first request needs them.
+
+Every template of the apps that the routes come from is loaded, along
+with the project's own templates, which may override them. With the
+cached loader, that's all the parsing and tag library imports that the
+routes would otherwise do on their first requests.
+
+The cache belongs to the process, so warming up has to happen in the
+process that serves requests, such as at the end of ``wsgi.py``.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Iterator, Optional, cast
+from django.apps import apps
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.base import BaseEngine
+from django.urls import URLPattern, URLResolver, get_resolver
+
+
+def routed_views(
+    resolver: Optional[URLResolver] = None, /
+) -> Iterator[Callable[..., Any]]:
+    """The views of every route in the URLConf."""
+    resolver = resolver or get_resolver()
+    # The stubs have the wrong type for the patterns of a resolver.
+    patterns = cast("list[URLPattern | URLResolver]", resolver.url_patterns)
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from routed_views(pattern)
+        elif getattr(pattern.callback, "route", None) is not None:
+            yield pattern.callback
+
+
+def route_modules() -> set[str]:
+    """The modules of the views and layouts of every route."""
+    modules: set[str] = set()
+    for routed in routed_views():
+        for func in (routed.view, *routed.layouts):  # type: ignore
+            modules.add(func.__module__)
+    return modules
+
+
+def template_dirs(engine: BaseEngine, modules: set[str], /) -> list[Path]:
+    dirs = [Path(d) for d in engine.dirs]
+    if engine.app_dirs:
+        for app_config in apps.get_app_configs():
+            if any(
+                module == app_config.name or module.startswith(f"{app_config.name}.")
+                for module in modules
+            ):
+                dirs.append(Path(app_config.path) / engine.app_dirname)
+    return dirs
+
+
+def template_names(directory: Path, /) -> Iterator[str]:
+    for path in sorted(directory.rglob("*")):
+        if path.is_file() and not path.name.startswith("."):
+            yield path.relative_to(directory).as_posix()
+
+
+def warm_up() -> list[tuple[str, float]]:
+    """Load the templates of every route, and return how long each took.
+
+    Broken templates fail straight away, rather than on some request.
+    """
+    modules = route_modules()
+    timings: list[tuple[str, float]] = []
+    for engine in engines.all():
+        for directory in template_dirs(engine, modules):
+            for name in template_names(directory):
+                start = perf_counter()
+                try:
+                    engine.get_template(name)
+                except TemplateSyntaxError as error:
+                    raise Exception(f"Template {name} is broken: {error}") from error
+                timings.append((name, perf_counter() - start))
+    return timings
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "temprojo.settings")
 
 application = get_asgi_application()
+
+# Load the templates now, rather than on the first requests for them.
+from temploco.warmup import warm_up  # noqa: E402
+
+warm_up()
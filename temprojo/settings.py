@@ -50,6 +50,9 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "temploco.replicas.ReadYourWritesMiddleware",
+    "temploco.prerender.PrerenderedMiddleware",
+    "temploco.timing.ServerTimingMiddleware",
 ]
 
 ROOT_URLCONF = "temprojo.urls"
@@ -83,6 +86,13 @@ DATABASES = {
     }
 }
 
+# Reads go to these databases, except for clients that just wrote.
+DATABASE_ROUTERS = ["temploco.replicas.ReplicaRouter"]
+TEMPLOCO_READ_REPLICAS: list[str] = []
+
+# Pages rendered in advance by prerender_routes are served from here.
+TEMPLOCO_PRERENDERED_DIR = None
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
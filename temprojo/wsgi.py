@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "temprojo.settings")
 
 application = get_wsgi_application()
+
+# Load the templates now, rather than on the first requests for them.
+from temploco.warmup import warm_up  # noqa: E402
+
+warm_up()